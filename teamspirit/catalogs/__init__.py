@@ -0,0 +1 @@
+default_app_config = 'teamspirit.catalogs.apps.CatalogsConfig'
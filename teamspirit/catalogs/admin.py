@@ -1,6 +1,27 @@
 from django.contrib import admin
 
-from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.catalogs.cache import bump_catalog_version
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
+
+
+class ProductVariantInline(admin.TabularInline):
+
+    model = ProductVariant
+    extra = 0
+
+
+class ProductAdmin(admin.ModelAdmin):
+
+    inlines = [ProductVariantInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        product = form.instance
+        if not change and not product.variants.exists():
+            # a new product without sizes gets the default ones
+            ProductVariant.objects.create_defaults([product.pk])
+            bump_catalog_version(product.catalog_id)
+
 
 admin.site.register(Catalog)
-admin.site.register(Product)
+admin.site.register(Product, ProductAdmin)
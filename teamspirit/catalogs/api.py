@@ -0,0 +1,186 @@
+"""Contain the read-only JSON API of the app ``catalogs``.
+
+The rows are read with ``QuerySet.values()`` and serialized as plain
+dicts, without building any model instance.
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from teamspirit.catalogs.models import Catalog, Product, ProductImageVariant
+from teamspirit.catalogs.views import catalog_last_modified, get_catalog
+from teamspirit.utils.pagination import decode_cursor, paginate_keyset
+
+# the number of rows per page
+API_PAGE_SIZE = 50
+# the responses may be kept by the browser of the member only
+API_MAX_AGE = 60
+
+CATALOG_FIELDS = ('id', 'name')
+PRODUCT_FIELDS = (
+    'id',
+    'name',
+    'price',
+    'is_free',
+    'image',
+    'image_placeholder',
+    'image_width',
+    'image_height',
+)
+
+
+def _page_url(request, cursor_name, cursor):
+    """Return the URL of a page, with the filters of the current one."""
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query[cursor_name] = cursor
+    return f"{request.path}?{query.urlencode()}"
+
+
+def _page_response(request, queryset, keyset, serialize):
+    """Return a page of ``queryset``, with the links to its neighbours."""
+    if 'after' in request.GET and 'before' in request.GET:
+        return JsonResponse(
+            {'error': "Un seul curseur est accepté."},
+            status=400,
+        )
+    try:
+        after = decode_cursor(request.GET.get('after'), keyset)
+        before = decode_cursor(request.GET.get('before'), keyset)
+    except ValueError:
+        return JsonResponse({'error': "Curseur invalide."}, status=400)
+    page = paginate_keyset(
+        queryset,
+        keyset,
+        API_PAGE_SIZE,
+        after=after,
+        before=before,
+    )
+    response = JsonResponse({
+        'results': serialize(page.object_list),
+        'previous': (
+            _page_url(request, 'before', page.previous_cursor)
+            if page.has_previous() else None
+        ),
+        'next': (
+            _page_url(request, 'after', page.next_cursor)
+            if page.has_next() else None
+        ),
+    })
+    patch_cache_control(response, private=True, max_age=API_MAX_AGE)
+    return response
+
+
+def catalogs_etag(request):
+    """Return the ETag of the catalogs, changed by any of their products."""
+    dates = Catalog.objects.aggregate(
+        catalog_count=Count('id', distinct=True),
+        catalogs_updated_at=Max('updated_at'),
+        products_updated_at=Max('product__updated_at'),
+    )
+    last_modified = max(
+        filter(None, (
+            dates['catalogs_updated_at'],
+            dates['products_updated_at'],
+        )),
+        default=None,
+    )
+    if last_modified is None:
+        return None
+    return f"{dates['catalog_count']}-{last_modified.timestamp()}"
+
+
+def products_etag(request, catalog_id):
+    """Return the ETag of the products of a catalog, for any member."""
+    last_modified = catalog_last_modified(request, catalog_id)
+    if last_modified is None:
+        return None
+    return f"{catalog_id}-{last_modified.timestamp()}"
+
+
+def serialize_catalogs(catalogs):
+    """Return the catalogs, with the URL of their products."""
+    return [
+        dict(
+            catalog,
+            products=reverse(
+                'catalogs:api_products',
+                args=[catalog['id']]
+            ),
+        )
+        for catalog in catalogs
+    ]
+
+
+def serialize_products(products):
+    """Return the products, with the URLs of their images."""
+    storage = Product._meta.get_field('image').storage
+    variants = {}
+    for product_id, image_format, width, name in (
+        ProductImageVariant.objects.filter(
+            product_id__in=[product['id'] for product in products]
+        ).values_list('product_id', 'format', 'width', 'file')
+    ):
+        variants.setdefault(product_id, []).append({
+            'format': image_format,
+            'width': width,
+            'url': storage.url(name),
+        })
+    return [
+        dict(
+            product,
+            image=storage.url(product['image']) if product['image'] else None,
+            image_variants=variants.get(product['id'], []),
+        )
+        for product in products
+    ]
+
+
+@condition(etag_func=catalogs_etag)
+def catalogs_api_view(request):
+    """List the catalogs, with their number of available products."""
+    return _page_response(
+        request,
+        Catalog.objects.with_product_counts().values(
+            *CATALOG_FIELDS,
+            'product_count',
+        ),
+        ('id',),
+        serialize_catalogs,
+    )
+
+
+@condition(etag_func=products_etag)
+def products_api_view(request, catalog_id):
+    """List the available products of a catalog.
+
+    The parameter ``size`` keeps the products available in this size.
+    """
+    if get_catalog(request, catalog_id) is None:
+        return JsonResponse({'error': "Catalogue introuvable."}, status=404)
+    products = Product.objects.available_in(catalog_id)
+    size = request.GET.get('size')
+    if size:
+        # one variant at most per product and size: no duplicate row
+        products = products.filter(
+            variants__size=size,
+            variants__available=True,
+        )
+    return _page_response(
+        request,
+        products.values(
+            *PRODUCT_FIELDS,
+            'catalog_id',
+        ),
+        ('catalog_id', 'id'),
+        serialize_products,
+    )
+
+
+catalogs_api_view = login_required(catalogs_api_view)
+products_api_view = login_required(products_api_view)
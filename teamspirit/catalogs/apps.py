@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CatalogsConfig(AppConfig):
     name = 'teamspirit.catalogs'
+
+    def ready(self):
+        import teamspirit.catalogs.signals  # noqa F401
@@ -0,0 +1,35 @@
+"""Contain the cached values related to the app ``catalogs``."""
+
+import time
+
+from django.core.cache import cache
+
+# the rendered grids are never stale: the timeout only bounds the memory
+# used by the grids of the previous versions
+CATALOG_GRID_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _catalog_version_key(catalog_id):
+    return f"catalogs:version:{catalog_id}"
+
+
+def get_catalog_version(catalog_id):
+    """Return the version of the rendered grids of a catalog.
+
+    A missing version starts from the current time, so that an evicted
+    version can never be reused by the grids of an older content.
+    """
+    key = _catalog_version_key(catalog_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_catalog_version(catalog_id):
+    """Invalidate the rendered grids of a catalog, and only them."""
+    try:
+        cache.incr(_catalog_version_key(catalog_id))
+    except ValueError:
+        cache.set(_catalog_version_key(catalog_id), time.time_ns(), None)
@@ -0,0 +1,179 @@
+"""Contain the helpers to resize the product images."""
+
+import base64
+import hashlib
+from io import BytesIO
+from pathlib import PurePosixPath
+from zipfile import ZipFile
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# the widths of the resized images, in pixels
+VARIANT_WIDTHS = (320, 640, 1280)
+# the formats of the resized images, with their name in Pillow
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+VARIANT_QUALITY = 80
+# the width of the placeholders inlined in the pages, in pixels
+PLACEHOLDER_WIDTH = 20
+PLACEHOLDER_QUALITY = 50
+
+
+def open_image(file):
+    """Return the upright RGB image of a file, or raise ``OSError``.
+
+    The image can be given to ``make_placeholder()`` and
+    ``resize_image()``, so that the file is read once.
+    """
+    with Image.open(file) as image:
+        return ImageOps.exif_transpose(image).convert('RGB')
+
+
+def _placeholder(image):
+    """Return the placeholder of an image, see ``make_placeholder()``."""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    buffer = BytesIO()
+    image.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR).save(
+        buffer,
+        'JPEG',
+        quality=PLACEHOLDER_QUALITY,
+    )
+    content = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f"data:image/jpeg;base64,{content}", image.width, image.height
+
+
+def make_placeholder(file):
+    """Return a tiny placeholder of an image file, and the image size.
+
+    Return ``(data_uri, width, height)``, where ``data_uri`` is a JPEG
+    thumbnail of ``PLACEHOLDER_WIDTH`` pixels, to inline in the pages.
+    Raise ``OSError`` if the file is not an image. ``file`` may also be
+    an image returned by ``open_image()``.
+    """
+    if not isinstance(file, Image.Image):
+        file = open_image(file)
+    return _placeholder(file)
+
+
+def resize_image(file, widths=VARIANT_WIDTHS, formats=VARIANT_FORMATS):
+    """Return the resized copies of an image file.
+
+    Return a list of ``(format, width, content)``, where ``content`` is
+    the encoded image. The image is never upscaled: the widths larger
+    than the original one are replaced by the original width. Raise
+    ``OSError`` if the file is not an image. ``file`` may also be an
+    image returned by ``open_image()``.
+    """
+    if not isinstance(file, Image.Image):
+        file = open_image(file)
+    return _resize(file, widths, formats)
+
+
+def _resize(image, widths=VARIANT_WIDTHS, formats=VARIANT_FORMATS):
+    variants = []
+    for width in sorted({min(width, image.width) for width in widths}):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for image_format, pillow_format in formats.items():
+            buffer = BytesIO()
+            resized.save(buffer, pillow_format, quality=VARIANT_QUALITY)
+            variants.append((image_format, width, buffer.getvalue()))
+    return variants
+
+
+def _store(name, content, written):
+    """Store ``content`` under ``name``, unless a file already has it.
+
+    The name of a new file is appended to ``written``.
+    """
+    if default_storage.exists(name):
+        return name
+    name = default_storage.save(name, ContentFile(content))
+    written.append(name)
+    return name
+
+
+def _read(path, archive=None):
+    """Return the content of ``path``, read from the zip ``archive`` if any.
+
+    Raise ``KeyError`` or ``OSError`` if the file is missing.
+    """
+    if archive is not None:
+        with ZipFile(archive) as zip_file:
+            return zip_file.read(path)
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def image_digest(path, archive=None):
+    """Return the SHA-256 hash of an image file, or ``None`` if missing.
+
+    Run in the worker processes of the command ``import_catalog``, to
+    store each content once whatever its number of paths.
+    """
+    try:
+        content = _read(path, archive)
+    except (KeyError, OSError):
+        return None
+    return hashlib.sha256(content).hexdigest()
+
+
+def store_image(path, archive=None):
+    """Hash, resize and store an image file.
+
+    Run in the worker processes of the command ``import_catalog``:
+    ``path`` is read from the zip file ``archive`` if given. The image
+    and its resized copies are named after the SHA-256 hash of the
+    image, as in ``ImageBlobManager.store()``, so that an image already
+    stored is not written again. Return a dict of:
+
+    - ``sha256`` and ``name``: the hash and name of the stored image;
+    - ``variants``: the ``(format, width, name)`` of its resized copies;
+    - ``placeholder``: the result of ``make_placeholder()``;
+    - ``written``: the names of the files written by this call, to
+      delete if the import fails;
+
+    or ``None`` if the file is missing or is not an image.
+    """
+    try:
+        content = _read(path, archive)
+        image = open_image(BytesIO(content))
+    except (KeyError, OSError):
+        return None
+    digest = hashlib.sha256(content).hexdigest()
+    extension = PurePosixPath(path).suffix.lower()
+    blob_field = apps.get_model('catalogs', 'ImageBlob')._meta.get_field(
+        'file'
+    )
+    variant_field = apps.get_model(
+        'catalogs',
+        'ProductImageVariant'
+    )._meta.get_field('file')
+    written = []
+    return {
+        'sha256': digest,
+        'name': _store(
+            blob_field.generate_filename(None, f"{digest}{extension}"),
+            content,
+            written,
+        ),
+        'variants': [
+            (
+                image_format,
+                width,
+                _store(
+                    variant_field.generate_filename(
+                        None,
+                        f"{digest}-{width}.{image_format}"
+                    ),
+                    variant_content,
+                    written,
+                ),
+            )
+            for image_format, width, variant_content in _resize(image)
+        ],
+        'placeholder': _placeholder(image),
+        'written': written,
+    }
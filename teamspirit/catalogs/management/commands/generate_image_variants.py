@@ -0,0 +1,81 @@
+"""Generate the resized images and placeholders of the existing products."""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from teamspirit.catalogs.cache import bump_catalog_version
+from teamspirit.catalogs.images import make_placeholder, open_image
+from teamspirit.catalogs.models import (
+    Catalog,
+    Product,
+    ProductImageVariant,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized images and placeholders of the products "
+        "missing them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Regenerate the resized images of all the products.",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            # the unreadable files are skipped until replaced
+            products = products.filter(
+                Q(image_variants__isnull=True) | Q(image_placeholder=''),
+                image_unreadable=False,
+            ).distinct()
+        product_count = variant_count = 0
+        catalog_ids = set()
+        for product in products.order_by('pk').iterator():
+            try:
+                with product.image.open('rb') as file:
+                    image = open_image(file)
+            except OSError:
+                image = None
+            if image is None:
+                variants = []
+                Product.objects.filter(pk=product.pk).update(
+                    image_unreadable=True,
+                )
+            else:
+                # the file is read once for the variants and placeholder
+                variants = ProductImageVariant.objects.generate_for(
+                    product,
+                    image=image,
+                )
+                placeholder, width, height = make_placeholder(image)
+                Product.objects.filter(pk=product.pk).update(
+                    image_placeholder=placeholder,
+                    image_width=width,
+                    image_height=height,
+                    image_unreadable=False,
+                    updated_at=timezone.now(),
+                )
+            catalog_ids.add(product.catalog_id)
+            product_count += 1
+            variant_count += len(variants)
+            if image is None:
+                self.stderr.write(
+                    f"Article {product.pk} : la photo n'a pas pu être lue."
+                )
+        # ``update()`` sends no signal: the grids are rendered again, and
+        # the ``Last-Modified`` header of the catalogs changes
+        Catalog.objects.filter(pk__in=catalog_ids).update(
+            updated_at=timezone.now()
+        )
+        for catalog_id in catalog_ids:
+            bump_catalog_version(catalog_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"{product_count} article(s) traité(s), "
+            f"{variant_count} image(s) générée(s)."
+        ))
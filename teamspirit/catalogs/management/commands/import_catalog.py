@@ -0,0 +1,307 @@
+"""Import a catalog from a CSV file and its images."""
+
+import csv
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from teamspirit.catalogs.cache import bump_catalog_version
+from teamspirit.catalogs.images import image_digest, store_image
+from teamspirit.catalogs.models import (
+    Catalog,
+    ImageBlob,
+    Product,
+    ProductImageVariant,
+    ProductVariant,
+)
+from teamspirit.catalogs.search import get_search_backend
+
+# the columns of the CSV file, as in the exports of the app ``preorders``
+NAME_COLUMN = 'Article'
+PRICE_COLUMN = 'Prix'
+IMAGE_COLUMN = 'Photo'
+# optional, e.g. 'S,M,L': the default sizes if empty
+SIZES_COLUMN = 'Tailles'
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a catalog and its products from a CSV file "
+        "(columns 'Article;Prix;Photo', and optionally 'Tailles' as "
+        "'S,M,L') and a folder or zip of images."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_file',
+            help="CSV file of the products, separated by ';'.",
+        )
+        parser.add_argument(
+            '--name',
+            required=True,
+            help="Name of the new catalog.",
+        )
+        parser.add_argument(
+            '--images',
+            help="Folder or zip file of the images named in the CSV file.",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes resizing and storing the images "
+                 "(0: no process).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of rows inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if Catalog.objects.filter(name=options['name']).exists():
+            raise CommandError(
+                f"Le catalogue « {options['name']} » existe déjà."
+            )
+        rows = self.read_rows(options['csv_file'])
+        images = self.store_images(
+            {row['image'] for row in rows if row['image']},
+            options['images'],
+            options['workers'],
+        )
+        for row in rows:
+            if row['image'] and images.get(row['image']) is None:
+                self.stderr.write(
+                    f"Ligne {row['line']} : la photo « {row['image']} » "
+                    "n'a pas pu être lue."
+                )
+        try:
+            with transaction.atomic():
+                # checked again, as the images took some time
+                if Catalog.objects.filter(name=options['name']).exists():
+                    raise CommandError(
+                        f"Le catalogue « {options['name']} » existe déjà."
+                    )
+                catalog = Catalog.objects.create(name=options['name'])
+                image_count = self.create_products(
+                    catalog,
+                    rows,
+                    images,
+                    options['batch_size'],
+                )
+        except BaseException:
+            self.delete_files(images)
+            raise
+        bump_catalog_version(catalog.pk)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(rows)} article(s) et {image_count} photo(s) importés "
+            f"en {elapsed:.1f} s ({len(rows) / elapsed:.0f} article(s)/s)."
+        ))
+
+    def read_rows(self, csv_file):
+        """Return the products of the CSV file, checked."""
+        rows = []
+        with open(csv_file, newline='', encoding='utf-8-sig') as file:
+            for line, row in enumerate(
+                csv.DictReader(file, delimiter=';'),
+                start=2,
+            ):
+                name = (row.get(NAME_COLUMN) or '').strip()
+                if not name:
+                    raise CommandError(f"Ligne {line} : article manquant.")
+                try:
+                    price = int(row.get(PRICE_COLUMN) or 0)
+                except ValueError:
+                    raise CommandError(f"Ligne {line} : prix invalide.")
+                sizes = [
+                    size.strip()
+                    for size in (row.get(SIZES_COLUMN) or '').split(',')
+                    if size.strip()
+                ]
+                rows.append({
+                    'line': line,
+                    'name': name,
+                    'price': price,
+                    'image': (row.get(IMAGE_COLUMN) or '').strip(),
+                    'sizes': (
+                        list(dict.fromkeys(sizes))
+                        or ProductVariant.DEFAULT_SIZES
+                    ),
+                })
+        return rows
+
+    def store_images(self, paths, images, workers):
+        """Resize and store the images in parallel, once per content.
+
+        Return the result of ``store_image()`` for each image path.
+        """
+        if paths and not images:
+            raise CommandError("Le dossier des photos est manquant.")
+        paths = sorted(paths)
+        if workers == 0 or not paths:
+            return self.map_images(paths, images, map)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=django.setup,
+        ) as executor:
+            return self.map_images(paths, images, executor.map)
+
+    def map_images(self, paths, images, map_function):
+        """Hash the images, then store one path per distinct content.
+
+        Two paths of the same content stored in parallel would be
+        written twice, under two names.
+        """
+        digests = dict(zip(
+            paths,
+            map_function(image_digest, *self.arguments(paths, images)),
+        ))
+        unique_paths = {}
+        for path, digest in digests.items():
+            if digest is not None:
+                unique_paths.setdefault(digest, path)
+        stored = dict(zip(
+            unique_paths.values(),
+            map_function(
+                store_image,
+                *self.arguments(list(unique_paths.values()), images)
+            ),
+        ))
+        return {
+            path: digest and stored[unique_paths[digest]]
+            for path, digest in digests.items()
+        }
+
+    def arguments(self, paths, images):
+        """Return the arguments of ``store_image()`` for each path."""
+        if images and images.endswith('.zip'):
+            return paths, [images] * len(paths)
+        return (
+            [os.path.join(images, path) for path in paths],
+            [None] * len(paths),
+        )
+
+    def delete_files(self, images):
+        """Delete the files written by a failed import.
+
+        The files used meanwhile by another image are kept.
+        """
+        written = {
+            name
+            for image in filter(None, images.values())
+            for name in image['written']
+        }
+        written -= set(
+            ImageBlob.objects.filter(
+                file__in=written
+            ).values_list('file', flat=True)
+        )
+        written -= set(
+            ProductImageVariant.objects.filter(
+                file__in=written
+            ).values_list('file', flat=True)
+        )
+        for name in written:
+            default_storage.delete(name)
+
+    def create_products(self, catalog, rows, images, batch_size):
+        """Insert the products, their sizes, images and resized copies.
+
+        Return the number of distinct images.
+        """
+        # the stored images, once per content, and their references
+        stored = {
+            image['sha256']: image
+            for image in filter(None, images.values())
+        }
+        references = Counter(
+            images[row['image']]['sha256'] for row in rows
+            if images.get(row['image']) is not None
+        )
+        blobs = ImageBlob.objects.in_bulk(list(stored), field_name='sha256')
+        for sha256, blob in blobs.items():
+            ImageBlob.objects.filter(pk=blob.pk).update(
+                reference_count=F('reference_count') + references[sha256]
+            )
+            # the image is already stored, maybe under another name
+            stored[sha256]['name'] = blob.file.name
+        ImageBlob.objects.bulk_create(
+            [
+                ImageBlob(
+                    sha256=sha256,
+                    file=image['name'],
+                    reference_count=references[sha256],
+                )
+                for sha256, image in stored.items()
+                if sha256 not in blobs
+            ],
+            batch_size=batch_size,
+        )
+        products = []
+        for row in rows:
+            product = Product(
+                name=row['name'],
+                price=row['price'],
+                catalog=catalog,
+            )
+            if images.get(row['image']) is not None:
+                image = stored[images[row['image']]['sha256']]
+                product.image = image['name']
+                (
+                    product.image_placeholder,
+                    product.image_width,
+                    product.image_height,
+                ) = image['placeholder']
+            products.append(product)
+        Product.objects.bulk_create(products, batch_size=batch_size)
+        product_ids = [product.pk for product in products]
+        if None in product_ids:
+            # the ids are not returned by every database: the new rows of
+            # the catalog are numbered in insertion order
+            product_ids = list(
+                Product.objects.filter(
+                    catalog=catalog
+                ).order_by('pk').values_list('pk', flat=True)
+            )
+        ProductVariant.objects.bulk_create(
+            [
+                ProductVariant(product_id=product_id, size=size)
+                for product_id, row in zip(product_ids, rows)
+                for size in row['sizes']
+            ],
+            batch_size=batch_size,
+        )
+        # the ids of the products are not returned by every database
+        variants = {
+            image['name']: image['variants'] for image in stored.values()
+        }
+        ProductImageVariant.objects.bulk_create(
+            [
+                ProductImageVariant(
+                    product_id=product_id,
+                    format=image_format,
+                    width=width,
+                    file=variant_name,
+                )
+                for product_id, image in Product.objects.filter(
+                    catalog=catalog
+                ).exclude(image='').values_list('pk', 'image')
+                for image_format, width, variant_name in variants[image]
+            ],
+            batch_size=batch_size,
+        )
+        get_search_backend().update_index(
+            Product.objects.filter(catalog=catalog),
+            catalog,
+        )
+        return len(stored)
@@ -1,13 +1,232 @@
 """Contain the managers for the models in app ``catalogs``."""
 
-from django.db import models
+import hashlib
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from teamspirit.catalogs.images import open_image, resize_image
+from teamspirit.catalogs.search import get_search_backend
 
 
 class CatalogManager(models.Manager):
     """Manage the model ``Catalog``."""
-    pass
+
+    def with_product_counts(self):
+        """Annotate each catalog with its number of available products."""
+        return self.annotate(
+            product_count=Count(
+                'product',
+                filter=Q(product__is_available=True),
+            )
+        ).order_by('name', 'pk')
+
+    def with_last_modified(self):
+        """Annotate each catalog with the last change of its products.
+
+        See ``Catalog.last_modified``.
+        """
+        return self.annotate(products_updated_at=Max('product__updated_at'))
 
 
 class ProductManager(models.Manager):
     """Manage the model ``Product``."""
-    pass
+
+    def available_in(self, catalog_id):
+        """Return the available products of a catalog.
+
+        The rows are read through the index
+        ``product_catalog_available_idx``.
+        """
+        return self.filter(catalog_id=catalog_id, is_available=True)
+
+    def search(self, text):
+        """Return the available products matching ``text``, best first.
+
+        The products are found in one indexed query on PostgreSQL, see
+        ``teamspirit.catalogs.search``.
+        """
+        return get_search_backend().search(
+            self.filter(is_available=True),
+            text,
+        )
+
+
+class ProductImageVariantManager(models.Manager):
+    """Manage the model ``ProductImageVariant``."""
+
+    def generate_for(self, product, image=None):
+        """Replace the resized images of a product by new ones.
+
+        Return the new variants; there is none if the product has no
+        image, or if its file is not an image. ``image`` is the image of
+        the product already returned by ``open_image()``, if any, so
+        that its file is not read again. The files of the previous
+        variants are deleted by the signal ``delete_image_variant_file``.
+        """
+        self.filter(product=product).delete()
+        if not product.image:
+            return []
+        # the products sharing a stored image share its resized copies
+        source_id = self.filter(
+            product__image=product.image.name
+        ).values_list('product_id', flat=True).first()
+        if source_id is not None:
+            return self.bulk_create([
+                self.model(
+                    product=product,
+                    format=variant.format,
+                    width=variant.width,
+                    file=variant.file.name,
+                )
+                for variant in self.filter(product_id=source_id)
+            ])
+        try:
+            if image is None:
+                with product.image.open('rb') as file:
+                    image = open_image(file)
+            contents = resize_image(image)
+        except OSError:
+            return []
+        stem = PurePosixPath(product.image.name).stem
+        variants = []
+        for image_format, width, content in contents:
+            variant = self.model(
+                product=product,
+                format=image_format,
+                width=width,
+            )
+            variant.file.save(
+                f"{stem}-{width}.{image_format}",
+                ContentFile(content),
+                save=False,
+            )
+            variants.append(variant)
+        with transaction.atomic():
+            return self.bulk_create(variants)
+
+
+class ProductVariantManager(models.Manager):
+    """Manage the model ``ProductVariant``."""
+
+    def create_defaults(self, product_ids, batch_size=None):
+        """Give the default sizes to the products, in bulk."""
+        return self.bulk_create(
+            [
+                self.model(product_id=product_id, size=size)
+                for product_id in product_ids
+                for size in self.model.DEFAULT_SIZES
+            ],
+            batch_size=batch_size,
+        )
+
+    def reserve(self, product_id, size, quantity):
+        """Reserve ``quantity`` items of a size of a product.
+
+        The counter is increased by a conditional ``UPDATE`` on the
+        ``(product, size)`` index, which cannot oversell even under
+        concurrent requests. Return whether the items are reserved; an
+        unknown or unavailable size cannot be reserved, a size without
+        quota is unlimited.
+        """
+        return bool(
+            self.filter(
+                Q(quota__isnull=True)
+                | Q(reserved__lte=F('quota') - quantity),
+                product_id=product_id,
+                size=size,
+                available=True,
+            ).update(reserved=F('reserved') + quantity)
+        )
+
+    def release(self, product_id, size, quantity):
+        """Give back ``quantity`` reserved items of a size of a product."""
+        return self.filter(product_id=product_id, size=size).update(
+            reserved=F('reserved') - quantity
+        )
+
+    def reconcile(self):
+        """Recompute the reserved items from the cart lines.
+
+        Return the number of drifted sizes, once they have been fixed.
+        """
+        ShoppingCartLine = apps.get_model('preorders', 'ShoppingCartLine')
+        reserved = ShoppingCartLine.objects.filter(
+            product=OuterRef('product'),
+            size=OuterRef('size'),
+        ).values('product', 'size').annotate(
+            total_quantity=Sum('quantity')
+        ).values('total_quantity')
+        return self.exclude(
+            reserved=Coalesce(Subquery(reserved), 0)
+        ).update(reserved=Coalesce(Subquery(reserved), 0))
+
+
+class ImageBlobManager(models.Manager):
+    """Manage the model ``ImageBlob``."""
+
+    def store(self, file):
+        """Store an uploaded image once, and count a new reference to it.
+
+        The file is hashed chunk by chunk, never held in memory as a
+        whole, and only written if no identical image is stored yet.
+        Return the name of the stored file.
+        """
+        sha256 = hashlib.sha256()
+        file.seek(0)
+        for chunk in file.chunks():
+            sha256.update(chunk)
+        file.seek(0)
+        digest = sha256.hexdigest()
+        extension = PurePosixPath(file.name).suffix.lower()
+        with transaction.atomic():
+            blob, created = self.get_or_create(sha256=digest)
+            if created:
+                name = blob.file.field.generate_filename(
+                    blob,
+                    f"{digest}{extension}",
+                )
+                # the file may be left by a rolled back transaction
+                if not blob.file.storage.exists(name):
+                    name = blob.file.storage.save(name, file)
+                blob.file.name = name
+                blob.reference_count = 1
+                blob.save(update_fields=['file', 'reference_count'])
+            else:
+                self.filter(pk=blob.pk).update(
+                    reference_count=F('reference_count') + 1
+                )
+        return blob.file.name
+
+    def retain(self, name):
+        """Count a new reference to an image already stored.
+
+        Used when a product takes the name of a stored image, e.g. when
+        it is copied. The files not stored by ``store()`` are left
+        untouched.
+        """
+        self.filter(file=name).update(
+            reference_count=F('reference_count') + 1
+        )
+
+    def release(self, name):
+        """Count one reference less to a stored image.
+
+        The image is deleted with its file once unreferenced. The files
+        not stored by ``store()`` are left untouched.
+        """
+        with transaction.atomic():
+            blob = self.select_for_update().filter(file=name).first()
+            if blob is None:
+                return
+            if blob.reference_count > 1:
+                self.filter(pk=blob.pk).update(
+                    reference_count=F('reference_count') - 1
+                )
+                return
+            blob.delete()
+            transaction.on_commit(lambda: blob.file.delete(save=False))
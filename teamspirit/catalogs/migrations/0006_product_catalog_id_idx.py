@@ -0,0 +1,17 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0005_remove_product_has_different_sizes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['catalog', 'id'], name='product_catalog_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0006_product_catalog_id_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_catalog_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['catalog', 'is_available', 'id'], name='product_catalog_available_idx'),
+        ),
+    ]
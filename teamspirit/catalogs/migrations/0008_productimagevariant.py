@@ -0,0 +1,31 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0007_product_catalog_available_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=4, verbose_name='Format')),
+                ('width', models.PositiveIntegerField(verbose_name='Largeur')),
+                ('file', models.FileField(upload_to='produits/variantes/', verbose_name='Photo')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='catalogs.Product')),
+            ],
+            options={
+                'ordering': ['format', 'width'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productimagevariant',
+            constraint=models.UniqueConstraint(fields=('product', 'format', 'width'), name='unique_product_format_width'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0008_productimagevariant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Dernière modification'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Dernière modification'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:35
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# the GIN indexes only exist on PostgreSQL: see ``teamspirit.catalogs.search``
+CREATE_SEARCH_INDEXES = [
+    "CREATE INDEX product_search_vector_idx ON catalogs_product "
+    "USING gin (search_vector)",
+    "CREATE INDEX product_name_trigram_idx ON catalogs_product "
+    "USING gin (name gin_trgm_ops)",
+    "UPDATE catalogs_product AS product SET search_vector = "
+    "setweight(to_tsvector('french', coalesce(product.name, '')), 'A') || "
+    "setweight(to_tsvector('french', coalesce(catalog.name, '')), 'B') "
+    "FROM catalogs_catalog AS catalog WHERE catalog.id = product.catalog_id",
+]
+DROP_SEARCH_INDEXES = [
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "DROP INDEX IF EXISTS product_name_trigram_idx",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in CREATE_SEARCH_INDEXES:
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in DROP_SEARCH_INDEXES:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0009_updated_at'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
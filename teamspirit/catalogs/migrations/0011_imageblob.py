@@ -0,0 +1,22 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0010_product_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='Empreinte SHA-256')),
+                ('file', models.FileField(upload_to='produits/', verbose_name='Photo')),
+                ('reference_count', models.PositiveIntegerField(default=0, verbose_name="Nombre d'articles")),
+            ],
+        ),
+    ]
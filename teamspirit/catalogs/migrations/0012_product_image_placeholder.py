@@ -0,0 +1,28 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0011_imageblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Hauteur de la photo'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_placeholder',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Aperçu de la photo'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Largeur de la photo'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0012_product_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.CharField(max_length=10, verbose_name='Taille')),
+                ('available', models.BooleanField(default=True, verbose_name='Disponible ?')),
+                ('quota', models.PositiveIntegerField(blank=True, null=True, verbose_name='Quantité disponible')),
+                ('reserved', models.IntegerField(default=0, editable=False, verbose_name='Quantité réservée')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='catalogs.Product')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productvariant',
+            constraint=models.UniqueConstraint(fields=('product', 'size'), name='unique_product_size'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0013_productvariant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_unreadable',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Photo illisible'),
+        ),
+    ]
@@ -1,8 +1,15 @@
 """Contain the models related to the app ``catalogs``."""
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-from teamspirit.catalogs.managers import CatalogManager, ProductManager
+from teamspirit.catalogs.managers import (
+    CatalogManager,
+    ImageBlobManager,
+    ProductImageVariantManager,
+    ProductManager,
+    ProductVariantManager,
+)
 
 
 class Catalog(models.Model):
@@ -15,12 +22,30 @@ class Catalog(models.Model):
         blank=False,
         default='(catalogue sans nom)',
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Dernière modification',
+        auto_now=True,
+    )
 
     objects = CatalogManager()
 
     def __str__(self):
         return f"{self.name}"
 
+    @property
+    def last_modified(self):
+        """Return the last time the catalog or one of its products changed.
+
+        The products are only taken into account in the catalogs fetched
+        with ``Catalog.objects.with_last_modified()``. The removed products
+        touch their catalog, so that the value also changes when a product
+        leaves the catalog.
+        """
+        products_updated_at = getattr(self, 'products_updated_at', None)
+        if products_updated_at is None:
+            return self.updated_at
+        return max(self.updated_at, products_updated_at)
+
 
 class Product(models.Model):
     """Contain product information."""
@@ -38,6 +63,29 @@ class Product(models.Model):
         verbose_name='Photo',
         upload_to='produits/',
     )
+    # maintained by the signal ``update_image_placeholder``
+    image_placeholder = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Aperçu de la photo',
+    )
+    image_width = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Largeur de la photo',
+    )
+    image_height = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Hauteur de la photo',
+    )
+    # the file could not be read: not processed again until replaced
+    image_unreadable = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Photo illisible',
+    )
     is_available = models.BooleanField(
         null=False,
         blank=False,
@@ -61,8 +109,157 @@ class Product(models.Model):
         on_delete=models.CASCADE,
         null=False,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Dernière modification',
+        auto_now=True,
+    )
+    # maintained by the signal ``update_product_search_vector``, and only
+    # used on PostgreSQL: see ``teamspirit.catalogs.search``
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
+
+    class Meta:
+        indexes = [
+            # the available products of a catalog, in the order of its pages
+            models.Index(
+                fields=['catalog', 'is_available', 'id'],
+                name='product_catalog_available_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
 
     objects = ProductManager()
+
+    def available_sizes(self):
+        """Return the sizes which can be ordered.
+
+        The variants are read from ``variants``: prefetch them.
+        """
+        return [
+            variant.size
+            for variant in self.variants.all()
+            if variant.available
+        ]
+
+
+class ProductImageVariant(models.Model):
+    """Contain a resized copy of the image of a product."""
+
+    class Format(models.TextChoices):
+        WEBP = 'webp', 'WebP'
+        JPEG = 'jpeg', 'JPEG'
+
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        null=False,
+        related_name='image_variants',
+    )
+    format = models.CharField(
+        max_length=4,
+        verbose_name='Format',
+        choices=Format.choices,
+    )
+    width = models.PositiveIntegerField(
+        verbose_name='Largeur',
+    )
+    file = models.FileField(
+        verbose_name='Photo',
+        upload_to='produits/variantes/',
+    )
+
+    objects = ProductImageVariantManager()
+
+    class Meta:
+        ordering = ['format', 'width']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'format', 'width'],
+                name='unique_product_format_width',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product} ({self.format}, {self.width} px)"
+
+
+class ProductVariant(models.Model):
+    """Contain a size of a product, its availability and its quota."""
+
+    # the sizes of a new product, unless others are given
+    DEFAULT_SIZES = ('XS', 'S', 'M', 'L', 'XL')
+
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        null=False,
+        related_name='variants',
+    )
+    size = models.CharField(
+        max_length=10,
+        verbose_name='Taille',
+        null=False,
+        blank=False,
+    )
+    available = models.BooleanField(
+        verbose_name='Disponible ?',
+        default=True,
+    )
+    quota = models.PositiveIntegerField(
+        verbose_name='Quantité disponible',
+        null=True,
+        blank=True,
+    )
+    # maintained by ``ProductVariantManager.reserve()`` and ``release()``
+    reserved = models.IntegerField(
+        verbose_name='Quantité réservée',
+        default=0,
+        editable=False,
+    )
+
+    objects = ProductVariantManager()
+
+    class Meta:
+        ordering = ['pk']
+        constraints = [
+            # also the index of the lookups of a size of a product
+            models.UniqueConstraint(
+                fields=['product', 'size'],
+                name='unique_product_size',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product} ({self.size})"
+
+
+class ImageBlob(models.Model):
+    """Contain a product image, stored once whatever its number of uses.
+
+    The file is named after the SHA-256 hash of its content, and deleted
+    when no product refers to it anymore.
+    """
+
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Empreinte SHA-256',
+    )
+    file = models.FileField(
+        verbose_name='Photo',
+        upload_to='produits/',
+    )
+    # maintained by ``ImageBlobManager.store()`` and ``release()``
+    reference_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Nombre d'articles",
+    )
+
+    objects = ImageBlobManager()
+
+    def __str__(self):
+        return f"{self.file.name} ({self.reference_count})"
@@ -0,0 +1,69 @@
+"""Contain the backends of the product search.
+
+On PostgreSQL, the products are found through a ``SearchVector`` of their
+name and catalog name, in French, with a trigram similarity on the name
+to forgive the typos: both are backed by a GIN index. Elsewhere (e.g. the
+tests on SQLite), a portable ``LIKE`` backend is used.
+"""
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q, Value
+
+SEARCH_CONFIG = 'french'
+# the maximal number of products shown by a search
+SEARCH_RESULTS = 24
+
+
+def product_search_vector(catalog):
+    """Return the search vector of the products of a catalog."""
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Value(catalog.name), weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class PostgresSearchBackend:
+    """Search the products through their indexed search vector."""
+
+    def search(self, queryset, text):
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        return queryset.annotate(
+            rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramSimilarity('name', text),
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_similar=text)
+        ).order_by('-rank', '-similarity', 'pk')
+
+    def update_index(self, products, catalog):
+        """Compute the search vector of ``products`` in a single query.
+
+        The products must all belong to ``catalog``.
+        """
+        return products.update(search_vector=product_search_vector(catalog))
+
+
+class LikeSearchBackend:
+    """Search the products with a ``LIKE`` on each word, without index."""
+
+    def search(self, queryset, text):
+        for word in text.split():
+            queryset = queryset.filter(
+                Q(name__icontains=word) | Q(catalog__name__icontains=word)
+            )
+        return queryset.order_by('name', 'pk')
+
+    def update_index(self, products, catalog):
+        return 0
+
+
+def get_search_backend():
+    """Return the search backend of the database in use."""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
@@ -0,0 +1,188 @@
+"""Keep the product images, cached grids and search vectors up to date."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from teamspirit.catalogs.cache import bump_catalog_version
+from teamspirit.catalogs.images import make_placeholder, open_image
+from teamspirit.catalogs.models import (
+    Catalog,
+    ImageBlob,
+    Product,
+    ProductImageVariant,
+    ProductVariant,
+)
+from teamspirit.catalogs.search import get_search_backend
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_image(sender, instance, **kwargs):
+    instance._previous_image = instance._previous_catalog_id = None
+    if instance.pk is not None:
+        previous = Product.objects.filter(
+            pk=instance.pk
+        ).values_list('image', 'catalog_id').first()
+        if previous is not None:
+            (
+                instance._previous_image,
+                instance._previous_catalog_id,
+            ) = previous
+
+
+# connected after ``remember_previous_image``
+@receiver(pre_save, sender=Product)
+def store_image_blob(sender, instance, **kwargs):
+    instance._stored_image = False
+    # a file not committed yet is a new upload
+    if instance.image and not instance.image._committed:
+        instance.image = ImageBlob.objects.store(instance.image)
+        instance._stored_image = True
+    elif instance.image and instance.image.name != getattr(
+        instance,
+        '_previous_image',
+        None,
+    ):
+        # the name of a stored image, released by ``release_image_blob``
+        # and ``release_previous_image_blob`` as an upload would be
+        ImageBlob.objects.retain(instance.image.name)
+
+
+# connected after ``store_image_blob``
+@receiver(pre_save, sender=Product)
+def update_image_placeholder(sender, instance, **kwargs):
+    # the image read once, resized again by ``generate_image_variants``
+    instance._opened_image = None
+    previous = getattr(instance, '_previous_image', None)
+    if not (
+        instance._stored_image
+        or (previous or '') != (instance.image.name or '')
+    ):
+        return
+    instance.image_placeholder = ''
+    instance.image_width = instance.image_height = None
+    instance.image_unreadable = False
+    if instance.image:
+        try:
+            with instance.image.open('rb') as file:
+                instance._opened_image = open_image(file)
+            (
+                instance.image_placeholder,
+                instance.image_width,
+                instance.image_height,
+            ) = make_placeholder(instance._opened_image)
+        except OSError:
+            instance.image_unreadable = True
+
+
+@receiver(post_save, sender=Product)
+def release_previous_image_blob(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous and (
+        getattr(instance, '_stored_image', False)
+        or previous != instance.image.name
+    ):
+        ImageBlob.objects.release(previous)
+
+
+@receiver(post_delete, sender=Product)
+def release_image_blob(sender, instance, **kwargs):
+    if instance.image:
+        ImageBlob.objects.release(instance.image.name)
+
+
+@receiver(post_save, sender=Product)
+def generate_image_variants(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if (previous or '') != (instance.image.name or ''):
+        if instance.image_unreadable:
+            # the file is not read again: no variant for it
+            ProductImageVariant.objects.filter(product=instance).delete()
+        else:
+            ProductImageVariant.objects.generate_for(
+                instance,
+                image=getattr(instance, '_opened_image', None),
+            )
+    # not kept in memory with the instance
+    instance._opened_image = None
+
+
+# connected after ``generate_image_variants``: the grid is rendered again
+# with the new resized images
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_catalog(sender, instance, **kwargs):
+    bump_catalog_version(instance.catalog_id)
+    previous = getattr(instance, '_previous_catalog_id', None)
+    if previous is not None and previous != instance.catalog_id:
+        bump_catalog_version(previous)
+
+
+@receiver(post_save, sender=Catalog)
+@receiver(post_delete, sender=Catalog)
+def invalidate_catalog(sender, instance, **kwargs):
+    bump_catalog_version(instance.pk)
+
+
+@receiver(post_delete, sender=ProductImageVariant)
+def delete_image_variant_file(sender, instance, **kwargs):
+    def delete_file():
+        # the products sharing an image may share its resized copies
+        if not ProductImageVariant.objects.filter(
+            file=instance.file.name
+        ).exists():
+            instance.file.delete(save=False)
+
+    # as ``ImageBlobManager.release()``: kept if the deletion is rolled back
+    transaction.on_commit(delete_file)
+
+
+def _touch_catalog(catalog_id):
+    """Mark a catalog as modified, for its ``Last-Modified`` header."""
+    Catalog.objects.filter(pk=catalog_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+def touch_previous_catalog(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_catalog_id', None)
+    if previous is not None and previous != instance.catalog_id:
+        _touch_catalog(previous)
+
+
+@receiver(post_delete, sender=Product)
+def touch_catalog(sender, instance, **kwargs):
+    _touch_catalog(instance.catalog_id)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def invalidate_variant_catalog(sender, instance, **kwargs):
+    # the sizes are shown on the grid; reserved items are only updated
+    # in bulk, without these signals
+    catalog_id = Product.objects.filter(
+        pk=instance.product_id
+    ).values_list('catalog_id', flat=True).first()
+    if catalog_id is None:
+        # deleted with its product, which invalidates the catalog
+        return
+    _touch_catalog(catalog_id)
+    bump_catalog_version(catalog_id)
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, **kwargs):
+    get_search_backend().update_index(
+        Product.objects.filter(pk=instance.pk),
+        # only fetched by the backends with an index
+        SimpleLazyObject(lambda: instance.catalog),
+    )
+
+
+@receiver(post_save, sender=Catalog)
+def update_catalog_search_vectors(sender, instance, **kwargs):
+    get_search_backend().update_index(
+        Product.objects.filter(catalog=instance),
+        instance,
+    )
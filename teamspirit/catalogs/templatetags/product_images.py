@@ -0,0 +1,25 @@
+"""Contain the template tags to display the product images."""
+
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('catalogs/product_picture.html')
+def product_picture(product, sizes='100vw'):
+    """Display the image of a product, with its resized copies.
+
+    The browser picks the smallest copy fitting ``sizes``, in WebP if it
+    supports it. Prefetch ``image_variants`` when listing products.
+    """
+    srcset = {}
+    for variant in product.image_variants.all():
+        srcset.setdefault(variant.format, []).append(
+            f"{variant.file.url} {variant.width}w"
+        )
+    return {
+        'product': product,
+        'sizes': sizes,
+        'webp_srcset': ', '.join(srcset.get('webp', [])),
+        'jpeg_srcset': ', '.join(srcset.get('jpeg', [])),
+    }
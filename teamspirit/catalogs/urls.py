@@ -1,9 +1,22 @@
 from django.urls import path
 
-from teamspirit.catalogs.views import catalog_view
+from teamspirit.catalogs.api import catalogs_api_view, products_api_view
+from teamspirit.catalogs.views import (
+    catalog_index_view,
+    catalog_view,
+    product_search_view,
+)
 
 app_name = 'catalogs'
 
 urlpatterns = [
-    path('', catalog_view, name="catalog"),
+    path('', catalog_index_view, name="index"),
+    path('<int:catalog_id>/', catalog_view, name="catalog"),
+    path('search/', product_search_view, name="search"),
+    path('api/catalogs/', catalogs_api_view, name="api_catalogs"),
+    path(
+        'api/catalogs/<int:catalog_id>/products/',
+        products_api_view,
+        name="api_products",
+    ),
 ]
@@ -1,14 +1,139 @@
 from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.views.decorators.http import condition
 from django.views.generic import ListView
 
-from teamspirit.catalogs.models import Product
+from teamspirit.catalogs.cache import CATALOG_GRID_TIMEOUT, get_catalog_version
+from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.catalogs.search import SEARCH_RESULTS
+from teamspirit.preorders.cache import get_cart_item_count
+from teamspirit.utils.pagination import decode_cursor, paginate_keyset
+
+
+def get_catalog(request, catalog_id):
+    """Return a catalog with the last change of its products, or ``None``.
+
+    The catalog is fetched once per request, for both the conditional
+    headers and the view.
+    """
+    if not hasattr(request, '_cached_catalog'):
+        request._cached_catalog = Catalog.objects.with_last_modified(
+        ).filter(pk=catalog_id).first()
+    return request._cached_catalog
+
+
+def catalog_last_modified(request, catalog_id):
+    catalog = get_catalog(request, catalog_id)
+    return catalog.last_modified if catalog is not None else None
+
+
+def catalog_etag(request, catalog_id):
+    """Return the ETag of a catalog page, as seen by the current member.
+
+    The page also shows the number of lines in the cart of the member.
+    """
+    last_modified = catalog_last_modified(request, catalog_id)
+    if last_modified is None:
+        return None
+    return (
+        f"{catalog_id}-{last_modified.timestamp()}-"
+        f"{request.user.pk}-{get_cart_item_count(request.user.pk)}"
+    )
+
+
+class CatalogIndexView(ListView):
+
+    template_name = "catalogs/catalog_index.html"
+
+    def get_queryset(self):
+        return Catalog.objects.with_product_counts()
 
 
 class CatalogView(ListView):
 
     model = Product
     template_name = "catalogs/catalog.html"
+    paginate_by = 12
+    # the key of the pages, backed by ``product_catalog_available_idx``
+    keyset = ('catalog_id', 'id')
+
+    @cached_property
+    def catalog(self):
+        catalog = get_catalog(self.request, self.kwargs['catalog_id'])
+        if catalog is None:
+            raise Http404("Catalogue introuvable.")
+        return catalog
+
+    def get_queryset(self):
+        return Product.objects.available_in(
+            self.catalog.id
+        ).prefetch_related('image_variants', 'variants')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['catalog'] = self.catalog
+        context['grid_version'] = get_catalog_version(self.catalog.id)
+        context['grid_timeout'] = CATALOG_GRID_TIMEOUT
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate on the key ``(catalog_id, id)``, without ``OFFSET``."""
+        if 'after' in self.request.GET and 'before' in self.request.GET:
+            # one page only, and one cached grid per page
+            raise Http404("Page invalide.")
+        try:
+            after = decode_cursor(self.request.GET.get('after'), self.keyset)
+            before = decode_cursor(
+                self.request.GET.get('before'),
+                self.keyset
+            )
+        except ValueError:
+            raise Http404("Page invalide.")
+        page = paginate_keyset(
+            queryset,
+            self.keyset,
+            page_size,
+            after=after,
+            before=before,
+        )
+        # the page stays lazy, and ``is_paginated`` is checked in the
+        # template: a cached grid reads no product
+        return (None, page, page, True)
+
+
+class ProductSearchView(ListView):
+
+    template_name = "catalogs/search.html"
+    # the maximal length of the searched text
+    max_length = 100
+
+    @cached_property
+    def search_text(self):
+        return self.request.GET.get('q', '').strip()[:self.max_length]
+
+    def get_queryset(self):
+        if not self.search_text:
+            return Product.objects.none()
+        return Product.objects.search(
+            self.search_text
+        ).prefetch_related('image_variants', 'variants')[:SEARCH_RESULTS]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_text'] = self.search_text
+        return context
+
+
+catalog_index_view = CatalogIndexView.as_view()
+catalog_index_view = login_required(catalog_index_view)
 
+product_search_view = ProductSearchView.as_view()
+product_search_view = login_required(product_search_view)
 
 catalog_view = CatalogView.as_view()
+catalog_view = condition(
+    etag_func=catalog_etag,
+    last_modified_func=catalog_last_modified,
+)(catalog_view)
 catalog_view = login_required(catalog_view)
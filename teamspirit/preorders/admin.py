@@ -1,6 +1,30 @@
 from django.contrib import admin
 
-from teamspirit.preorders.models import ShoppingCart, ShoppingCartLine
+from teamspirit.preorders.models import (
+    Campaign,
+    OrderLine,
+    ProductQuota,
+    ShoppingCart,
+    ShoppingCartLine,
+)
 
+
+def archive_campaigns(modeladmin, request, queryset):
+    Campaign.objects.archive(queryset)
+
+
+archive_campaigns.short_description = "Archiver les campagnes sélectionnées"
+
+
+class CampaignAdmin(admin.ModelAdmin):
+
+    list_display = ('name', 'opens_at', 'closes_at', 'is_archived')
+    list_filter = ('is_archived',)
+    actions = [archive_campaigns]
+
+
+admin.site.register(Campaign, CampaignAdmin)
 admin.site.register(ShoppingCart)
 admin.site.register(ShoppingCartLine)
+admin.site.register(OrderLine)
+admin.site.register(ProductQuota)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PreordersConfig(AppConfig):
     name = 'teamspirit.preorders'
+
+    def ready(self):
+        import teamspirit.preorders.signals  # noqa F401
@@ -0,0 +1,82 @@
+"""Contain the cached values related to the app ``preorders``."""
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from teamspirit.preorders.models import Campaign, ShoppingCartLine
+
+# bump this version whenever the cached value changes of meaning
+CART_ITEM_COUNT_VERSION = 2
+CART_ITEM_COUNT_TIMEOUT = 24 * 60 * 60
+
+CURRENT_CAMPAIGN_KEY = 'preorders:current_campaign'
+
+
+def get_current_campaign_id():
+    """Return the id of the current campaign, or ``None``.
+
+    The value is cached until a campaign changes, or until the next
+    campaign opens.
+    """
+    campaign_id = cache.get(CURRENT_CAMPAIGN_KEY)
+    if campaign_id is None:
+        now = timezone.now()
+        # 0 if no campaign is current, as ``None`` is a cache miss
+        campaign_id = Campaign.objects.current().values_list(
+            'pk',
+            flat=True,
+        ).first() or 0
+        next_opening = Campaign.objects.filter(
+            is_archived=False,
+            opens_at__gt=now,
+        ).aggregate(next_opening=Min('opens_at'))['next_opening']
+        timeout = CART_ITEM_COUNT_TIMEOUT
+        if next_opening is not None:
+            timeout = min(
+                timeout,
+                int((next_opening - now).total_seconds()) + 1,
+            )
+        cache.set(CURRENT_CAMPAIGN_KEY, campaign_id, timeout)
+    return campaign_id or None
+
+
+def invalidate_current_campaign():
+    cache.delete(CURRENT_CAMPAIGN_KEY)
+
+
+def _cart_item_count_key(user_id, campaign_id):
+    return f"preorders:cart_item_count:{campaign_id}:{user_id}"
+
+
+def get_cart_item_count(user_id):
+    """Return the number of lines in the cart of a user.
+
+    Only the cart of the current campaign is counted.
+    The value is cached per campaign, and counted with one query on a
+    cache miss.
+    """
+    campaign_id = get_current_campaign_id()
+    if campaign_id is None:
+        return 0
+    key = _cart_item_count_key(user_id, campaign_id)
+    count = cache.get(key, version=CART_ITEM_COUNT_VERSION)
+    if count is None:
+        count = ShoppingCartLine.objects.filter(
+            campaign_id=campaign_id,
+            shopping_cart__user_id=user_id,
+        ).count()
+        cache.set(
+            key,
+            count,
+            CART_ITEM_COUNT_TIMEOUT,
+            version=CART_ITEM_COUNT_VERSION,
+        )
+    return count
+
+
+def invalidate_cart_item_count(user_id, campaign_id):
+    cache.delete(
+        _cart_item_count_key(user_id, campaign_id),
+        version=CART_ITEM_COUNT_VERSION,
+    )
@@ -0,0 +1,15 @@
+"""Contain the request helpers related to the app ``preorders``."""
+
+from teamspirit.preorders.models import ShoppingCart
+
+
+def get_shopping_cart(request):
+    """Return the cart of the request user for the current campaign.
+
+    The cart is cached on the request, so that every view, form or
+    template of the same request share the same instance.
+    """
+    if not hasattr(request, '_cached_shopping_cart'):
+        request._cached_shopping_cart = \
+            ShoppingCart.objects.get_current_for(request.user)
+    return request._cached_shopping_cart
@@ -0,0 +1,13 @@
+from functools import partial
+
+from teamspirit.preorders.cache import get_cart_item_count
+
+
+def shopping_cart_context(request):
+    # the count is only read if the template displays it
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'shopping_cart_item_count': partial(get_cart_item_count, user.pk)
+    }
@@ -1,25 +1,73 @@
+import uuid
+from collections import defaultdict
+
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
-from django.forms import HiddenInput, ModelForm
+from django.db import transaction
+from django.forms import (
+    BaseModelFormSet,
+    CharField,
+    HiddenInput,
+    ModelForm,
+    Select,
+    ValidationError,
+    modelformset_factory,
+)
+
+from teamspirit.catalogs.models import ProductVariant
+from teamspirit.preorders.models import (
+    ProductQuota,
+    ShoppingCart,
+    ShoppingCartLine,
+)
+
+
+def new_idempotency_key():
+    return uuid.uuid4().hex
 
-from teamspirit.preorders.models import ShoppingCartLine
+
+def size_choices(product, current_size=None):
+    """Return the available sizes of ``product``, with ``current_size``.
+
+    The variants are read from ``product.variants``: prefetch them.
+    """
+    return [
+        (variant.size, variant.size)
+        for variant in product.variants.all()
+        if variant.available or variant.size == current_size
+    ]
 
 
 class AddToCartForm(ModelForm):
 
+    # identify this form, so that a replayed submission is ignored
+    idempotency_key = CharField(
+        widget=HiddenInput(),
+        required=False,
+        initial=new_idempotency_key,
+    )
+
     class Meta:
         model = ShoppingCartLine
-        fields = '__all__'
+        # the cart is the one of the request user, never a posted one
+        fields = ('product', 'quantity', 'size')
 
     def __init__(self, *args, **kwargs):
+        # the cart of the request user, with its campaign
+        self.shopping_cart = kwargs.pop('shopping_cart', None)
+        # the product of the form, with its prefetched variants
+        product = kwargs.pop('product', None)
         super(AddToCartForm, self).__init__(*args, **kwargs)
+        if product is not None:
+            self.fields['size'].widget = Select(
+                choices=size_choices(product)
+            )
         self.helper = FormHelper()
         self.helper.form_id = 'id-add-to-cart-form'
         self.helper.form_class = 'form-horizontal'
         self.helper.label_class = 'col-lg-4'
         self.helper.field_class = 'col-lg-4'
         self.helper.form_method = 'post'
-        self.fields['shopping_cart'].widget = HiddenInput()
         self.fields['product'].widget = HiddenInput()
         self.helper.add_input(
             Submit('submit', 'Ajouter au panier', css_class="col-12")
@@ -27,20 +75,56 @@ class AddToCartForm(ModelForm):
         if self.is_valid():
             self.save()
 
+    def clean(self):
+        cleaned_data = super(AddToCartForm, self).clean()
+        if (
+            self.shopping_cart is None
+            or not self.shopping_cart.is_editable()
+        ):
+            raise ValidationError("Les pré-commandes sont closes.")
+        return cleaned_data
+
+    def validate_unique(self):
+        # an existing line is not an error: it is merged by ``save()``
+        pass
+
+    def save(self, commit=True):
+        if not commit:
+            line = super(AddToCartForm, self).save(commit=False)
+            line.shopping_cart = self.shopping_cart
+            return line
+        # the form is saved once, even if ``save()`` is called again
+        if hasattr(self, 'line'):
+            return self.line
+        try:
+            self.line = ShoppingCartLine.objects.add_to_cart(
+                shopping_cart=self.shopping_cart,
+                product=self.cleaned_data['product'],
+                size=self.cleaned_data['size'],
+                quantity=self.cleaned_data['quantity'],
+            )
+        except ValidationError as error:
+            self.line = None
+            self.add_error(None, error)
+        return self.line
+
 
 class DropFromCartForm(ModelForm):
 
+    # identify this form, so that a replayed submission is ignored
+    idempotency_key = CharField(
+        widget=HiddenInput(),
+        required=False,
+        initial=new_idempotency_key,
+    )
+
     class Meta:
         model = ShoppingCartLine
         fields = []
 
     def __init__(self, *args, **kwargs):
-        self.request_user = kwargs.pop('request_user')
-        shopping_cart_line = kwargs.pop('shopping_cart_line')
-        self.line_user = shopping_cart_line.shopping_cart.user
-        self.shopping_cart_line = ShoppingCartLine.objects.get(
-            id=kwargs.pop('line_id')
-        )
+        # the line is already filtered on its owner by the view
+        self.shopping_cart_line = kwargs.pop('shopping_cart_line')
         super(DropFromCartForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper()
         self.helper.form_id = 'id-drop-from-cart-form'
@@ -54,9 +138,136 @@ class DropFromCartForm(ModelForm):
         if self.is_valid():
             self.save()
 
+    def clean(self):
+        cleaned_data = super(DropFromCartForm, self).clean()
+        if not self.shopping_cart_line.shopping_cart.is_editable():
+            raise ValidationError("Les pré-commandes sont closes.")
+        return cleaned_data
+
     def save(self, commit=True):
-        if commit:
-            # /!\ prevent this action for other users!
-            if self.request_user == self.line_user:
-                self.shopping_cart_line.delete()
+        if commit and self.is_valid():
+            self.shopping_cart_line.delete()
         return self
+
+
+class ShoppingCartLineForm(ModelForm):
+
+    class Meta:
+        model = ShoppingCartLine
+        fields = ['quantity', 'size']
+
+    def __init__(self, *args, **kwargs):
+        super(ShoppingCartLineForm, self).__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.fields['size'].widget = Select(
+                choices=size_choices(
+                    self.instance.product,
+                    self.instance.size,
+                )
+            )
+
+
+class BaseShoppingCartLineFormSet(BaseModelFormSet):
+    """Edit all the lines of a cart at once."""
+
+    def clean(self):
+        super(BaseShoppingCartLineFormSet, self).clean()
+        if any(self.errors):
+            return
+        # a product can only be once in the cart with the same size
+        products_sizes = set()
+        for form in self.initial_forms:
+            product_size = (form.instance.product_id, form.instance.size)
+            if product_size in products_sizes:
+                raise ValidationError(
+                    "Un même article ne peut figurer qu'une fois "
+                    "par taille dans le panier."
+                )
+            products_sizes.add(product_size)
+
+    def save(self, commit=True):
+        """Update the changed lines with a single ``bulk_update``.
+
+        Return the updated lines, or ``None`` if the quota of a product
+        does not allow the new quantities.
+        """
+        lines = [
+            form.instance for form in self.initial_forms if form.has_changed()
+        ]
+        if not commit or not lines:
+            return lines
+        try:
+            with transaction.atomic():
+                # lock the lines, and compute the changes from the stored
+                # rows: another request may have changed them meanwhile
+                stored = {
+                    line['pk']: line
+                    for line in ShoppingCartLine.objects.select_for_update(
+                    ).filter(
+                        pk__in=[line.pk for line in lines],
+                    ).values('pk', 'quantity', 'size')
+                }
+                # the lines deleted meanwhile are not saved again
+                lines = [line for line in lines if line.pk in stored]
+                amount = 0
+                quantities = defaultdict(int)
+                size_quantities = defaultdict(int)
+                for line in lines:
+                    product = line.product
+                    initial = stored[line.pk]
+                    quantity = line.quantity - initial['quantity']
+                    amount += (product.price or 0) * quantity
+                    quantities[product] += quantity
+                    # a changed size moves the items from a variant to another
+                    size_quantities[product, initial['size']] -= \
+                        initial['quantity']
+                    size_quantities[product, line.size] += line.quantity
+                for product, quantity in quantities.items():
+                    if quantity < 0:
+                        ProductQuota.objects.release(product.pk, -quantity)
+                    elif quantity and not ProductQuota.objects.reserve(
+                        product.pk,
+                        quantity
+                    ):
+                        raise ValidationError(
+                            "Il ne reste pas assez d'exemplaires de "
+                            f"l'article {product}."
+                        )
+                for (product, size), quantity in size_quantities.items():
+                    if quantity < 0:
+                        ProductVariant.objects.release(
+                            product.pk,
+                            size,
+                            -quantity
+                        )
+                    elif quantity and not ProductVariant.objects.reserve(
+                        product.pk,
+                        size,
+                        quantity
+                    ):
+                        raise ValidationError(
+                            f"La taille {size} de l'article {product} "
+                            "n'est pas disponible."
+                        )
+                if lines:
+                    ShoppingCartLine.objects.bulk_update(
+                        lines,
+                        ['quantity', 'size']
+                    )
+                    # ``bulk_update()`` sends no signal: shift the totals here
+                    ShoppingCart.objects.shift_totals(
+                        lines[0].shopping_cart_id,
+                        amount=amount,
+                    )
+        except ValidationError as error:
+            self._non_form_errors.extend(error.messages)
+            return None
+        return lines
+
+
+ShoppingCartLineFormSet = modelformset_factory(
+    ShoppingCartLine,
+    form=ShoppingCartLineForm,
+    formset=BaseShoppingCartLineFormSet,
+    extra=0,
+)
@@ -0,0 +1,40 @@
+"""Close the preorder campaign."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from teamspirit.preorders.models import Campaign, ShoppingCart
+
+
+class Command(BaseCommand):
+    help = "Close the open carts and snapshot their lines as orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of order lines inserted per query.",
+        )
+        parser.add_argument(
+            '--campaign',
+            type=int,
+            help="Id of the campaign to close (default: all the campaigns).",
+        )
+
+    def handle(self, *args, **options):
+        campaign = None
+        if options['campaign']:
+            try:
+                campaign = Campaign.objects.get(pk=options['campaign'])
+            except Campaign.DoesNotExist:
+                raise CommandError(
+                    f"La campagne {options['campaign']} n'existe pas."
+                )
+        cart_count, line_count = ShoppingCart.objects.close_campaign(
+            campaign=campaign,
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{cart_count} panier(s) clos, "
+            f"{line_count} ligne(s) de commande enregistrée(s)."
+        ))
@@ -0,0 +1,50 @@
+"""Export the supplier order, aggregated per product and size."""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from teamspirit.preorders.managers import SUPPLIER_ORDER_HEADER
+from teamspirit.preorders.models import Campaign, ShoppingCartLine
+
+
+class Command(BaseCommand):
+    help = "Export the quantities per product and size of a campaign."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help="Path of the CSV file to write (default: standard output).",
+        )
+        parser.add_argument(
+            '--campaign',
+            type=int,
+            help="Id of the campaign (default: the current campaign).",
+        )
+
+    def handle(self, *args, **options):
+        if options['campaign']:
+            try:
+                campaign = Campaign.objects.get(pk=options['campaign'])
+            except Campaign.DoesNotExist:
+                raise CommandError(
+                    f"La campagne {options['campaign']} n'existe pas."
+                )
+        else:
+            campaign = Campaign.objects.get_current()
+            if campaign is None:
+                raise CommandError(
+                    "Aucune campagne de pré-commande n'est en cours."
+                )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                self.write_rows(output, campaign)
+        else:
+            self.write_rows(self.stdout, campaign)
+
+    def write_rows(self, output, campaign):
+        writer = csv.writer(output, delimiter=';')
+        writer.writerow(SUPPLIER_ORDER_HEADER)
+        writer.writerows(
+            ShoppingCartLine.objects.supplier_order(campaign)
+        )
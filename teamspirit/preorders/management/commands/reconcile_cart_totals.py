@@ -0,0 +1,35 @@
+"""Recompute the denormalized totals of all shopping carts and quotas."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from teamspirit.catalogs.models import ProductVariant
+from teamspirit.preorders.models import ProductQuota, ShoppingCart
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the totals of the open shopping carts and the reserved "
+        "quantities of all products and sizes, and report any drift."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = ShoppingCart.objects.reconcile_totals()
+            drifted_quotas = ProductQuota.objects.reconcile()
+            drifted_variants = ProductVariant.objects.reconcile()
+        for cart, stored, computed in drifted:
+            self.stdout.write(
+                f"Panier {cart.pk} : "
+                f"{stored[0]} € / {stored[1]} ligne(s) stockés, "
+                f"{computed[0]} € / {computed[1]} ligne(s) recalculés"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(drifted)} panier(s) corrigé(s)."
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f"{drifted_quotas} quota(s) corrigé(s)."
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f"{drifted_variants} taille(s) corrigée(s)."
+        ))
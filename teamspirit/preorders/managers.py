@@ -1,13 +1,322 @@
 """Contain the managers for the models in app ``preorders``."""
 
-from django.db import models
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# the columns of the rows of ``ShoppingCartLineManager.supplier_order()``
+SUPPLIER_ORDER_HEADER = ['Article', 'Taille', 'Quantité', 'Montant']
+
+
+class CampaignManager(models.Manager):
+    """Manage the model ``Campaign``."""
+
+    def current(self):
+        """Return the queryset of the current campaign.
+
+        It is the latest opened campaign which is not archived, even if its
+        closing date is over: its carts can still be viewed.
+        """
+        return self.filter(
+            is_archived=False,
+            opens_at__lte=timezone.now(),
+        ).order_by('-opens_at')[:1]
+
+    def get_current(self):
+        """Return the current campaign, or ``None`` if there is none.
+
+        The campaigns are only created from the admin: no request can
+        open the preorders by itself.
+        """
+        return self.current().first()
+
+    def archive(self, campaigns):
+        """Archive ``campaigns`` and close their carts, in bulk."""
+        # ``cache`` imports the models, which import this module
+        from teamspirit.preorders.cache import invalidate_current_campaign
+        ShoppingCart = apps.get_model('preorders', 'ShoppingCart')
+        with transaction.atomic():
+            ShoppingCart.objects.filter(
+                campaign__in=campaigns,
+                is_open=True,
+            ).update(is_open=False)
+            # ``update()`` sends no signal: forget the current campaign here
+            transaction.on_commit(invalidate_current_campaign)
+            return campaigns.update(is_archived=True)
 
 
 class ShoppingCartManager(models.Manager):
     """Manage the model ``ShoppingCart``."""
-    pass
+
+    def get_current_for(self, user):
+        """Return the cart of ``user`` for the current campaign.
+
+        The current campaign is resolved in the same query as the cart;
+        the cart is created if needed. Return ``None`` if there is no
+        current campaign: the preorders are closed.
+        """
+        Campaign = apps.get_model('preorders', 'Campaign')
+        cart = self.filter(
+            user=user,
+            campaign=Subquery(Campaign.objects.current().values('pk')),
+        ).select_related('campaign').first()
+        if cart is None:
+            campaign = Campaign.objects.get_current()
+            if campaign is None:
+                return None
+            cart = self.get_or_create(user=user, campaign=campaign)[0]
+        return cart
+
+    def with_totals(self):
+        """Annotate each cart with its ``amount`` and its ``line_count``.
+
+        Both values are computed by the database in one aggregated query,
+        instead of fetching every line and its product.
+        """
+        return self.annotate(
+            amount=Coalesce(
+                Sum(
+                    F('shoppingcartline__product__price')
+                    * F('shoppingcartline__quantity'),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+            line_count=Count('shoppingcartline'),
+        )
+
+    def shift_totals(self, cart_id, amount=0, count=0):
+        """Shift the stored totals of a cart, atomically in the database."""
+        return self.filter(pk=cart_id).update(
+            total_amount=F('total_amount') + amount,
+            item_count=F('item_count') + count,
+        )
+
+    def reconcile_totals(self):
+        """Recompute the stored totals of every open cart from its lines.
+
+        The closed carts keep the totals of their ``OrderLine`` snapshots.
+        Return the list of ``(cart, stored_totals, computed_totals)`` for
+        the carts which had drifted, once they have been fixed.
+        """
+        drifted = []
+        for cart in self.with_totals().filter(is_open=True).only(
+            'id',
+            'total_amount',
+            'item_count',
+        ).iterator():
+            stored = (cart.total_amount, cart.item_count)
+            computed = (cart.amount, cart.line_count)
+            if stored != computed:
+                cart.total_amount, cart.item_count = computed
+                drifted.append((cart, stored, computed))
+        self.bulk_update(
+            [cart for cart, _stored, _computed in drifted],
+            ['total_amount', 'item_count'],
+            batch_size=500,
+        )
+        return drifted
+
+    def close_campaign(self, campaign=None, batch_size=500):
+        """Close the open carts and snapshot their lines.
+
+        Only the carts of ``campaign`` are closed, if given.
+
+        Each line is copied into an ``OrderLine`` with the product name and
+        price of the moment, so that later product changes do not rewrite
+        the orders. Return the number of closed carts and of order lines.
+        """
+        ShoppingCartLine = apps.get_model('preorders', 'ShoppingCartLine')
+        OrderLine = apps.get_model('preorders', 'OrderLine')
+        carts = self.filter(is_open=True)
+        lines = ShoppingCartLine.objects.filter(shopping_cart__is_open=True)
+        if campaign is not None:
+            carts = carts.filter(campaign=campaign)
+            lines = lines.filter(campaign=campaign)
+        with transaction.atomic():
+            # lock the open carts, so that no line is added meanwhile
+            cart_count = len(
+                carts.select_for_update().values_list('pk', flat=True)
+            )
+            lines = lines.select_related('product').order_by('pk')
+            order_lines = []
+            line_count = 0
+            for line in lines.iterator(chunk_size=batch_size):
+                order_lines.append(OrderLine.from_shopping_cart_line(line))
+                if len(order_lines) == batch_size:
+                    OrderLine.objects.bulk_create(order_lines)
+                    line_count += len(order_lines)
+                    order_lines = []
+            OrderLine.objects.bulk_create(order_lines)
+            line_count += len(order_lines)
+            carts.update(is_open=False)
+        return cart_count, line_count
 
 
 class ShoppingCartLineManager(models.Manager):
     """Manage the model ``ShoppingCartLine``."""
+
+    def add_to_cart(self, shopping_cart, product, size, quantity):
+        """Add ``quantity`` items to a cart, merging with an existing line.
+
+        The items are first reserved within the quotas of the product and
+        of its size, then
+        the quantity of an existing line is increased by a conditional
+        ``UPDATE``, so that concurrent requests can neither create
+        duplicate lines, nor exceed ``MAX_QUANTITY``, nor oversell.
+        Return the line, or raise ``ValidationError`` if the items cannot
+        be added.
+        """
+        ProductQuota = apps.get_model('preorders', 'ProductQuota')
+        ProductVariant = apps.get_model('catalogs', 'ProductVariant')
+        with transaction.atomic():
+            if not ProductQuota.objects.reserve(product.pk, quantity):
+                raise ValidationError(
+                    "Il ne reste pas assez d'exemplaires de cet article."
+                )
+            if not ProductVariant.objects.reserve(
+                product.pk,
+                size,
+                quantity
+            ):
+                raise ValidationError({
+                    'size': "Cette taille n'est pas disponible pour cet "
+                            "article."
+                })
+            line, created = self.get_or_create(
+                shopping_cart=shopping_cart,
+                product=product,
+                size=size,
+                defaults={'quantity': quantity},
+            )
+            if created:
+                return line
+            updated = self.filter(
+                pk=line.pk,
+                quantity__lte=self.model.MAX_QUANTITY - quantity,
+            ).update(quantity=F('quantity') + quantity)
+            if not updated:
+                # also cancels the reservation
+                raise ValidationError({
+                    'quantity': "La quantité maximale pour cet article est "
+                                f"de {self.model.MAX_QUANTITY}."
+                })
+            # ``update()`` sends no signal: shift the cart totals here
+            type(shopping_cart).objects.shift_totals(
+                shopping_cart.pk,
+                amount=(product.price or 0) * quantity,
+            )
+        line.refresh_from_db(fields=['quantity'])
+        return line
+
+    def supplier_order(self, campaign):
+        """Return the total quantity per product and size of a campaign.
+
+        Return a list of rows ``(product name, size, quantity, amount)``,
+        grouped by the database in a single query. The lines of the open
+        carts are priced at the current product prices; the closed carts
+        are read from their ``OrderLine`` snapshots, so that the report of
+        a placed order does not change with later price edits.
+        """
+        OrderLine = apps.get_model('preorders', 'OrderLine')
+        open_rows = self.filter(
+            campaign=campaign,
+            shopping_cart__is_open=True,
+        ).order_by().values(
+            'product_id',
+            'product__name',
+            'size',
+        ).annotate(
+            total_quantity=Sum('quantity'),
+            amount=Coalesce(
+                Sum(
+                    F('product__price') * F('quantity'),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+        ).values_list(
+            'product_id',
+            'product__name',
+            'size',
+            'total_quantity',
+            'amount',
+        )
+        closed_rows = OrderLine.objects.filter(
+            shopping_cart__campaign=campaign,
+            shopping_cart__is_open=False,
+        ).order_by().values(
+            'product_id',
+            'product_name',
+            'size',
+        ).annotate(
+            total_quantity=Sum('quantity'),
+            total_amount=Sum('amount'),
+        ).values_list(
+            'product_id',
+            'product_name',
+            'size',
+            'total_quantity',
+            'total_amount',
+        )
+        totals = {}
+        for product_id, name, size, quantity, amount in open_rows.union(
+            closed_rows,
+            all=True,
+        ):
+            total = totals.setdefault((name, product_id or 0, size), [0, 0])
+            total[0] += quantity
+            total[1] += amount
+        return [
+            (name, size, quantity, amount)
+            for (name, _product_id, size), (quantity, amount)
+            in sorted(totals.items())
+        ]
+
+
+class OrderLineManager(models.Manager):
+    """Manage the model ``OrderLine``."""
     pass
+
+
+class ProductQuotaManager(models.Manager):
+    """Manage the model ``ProductQuota``."""
+
+    def reserve(self, product_id, quantity):
+        """Reserve ``quantity`` items of a product, within its quota.
+
+        The counter is increased by a conditional ``UPDATE``, which cannot
+        oversell even under concurrent requests. Return whether the items
+        are reserved; a product without quota is unlimited.
+        """
+        reserved = self.filter(
+            product_id=product_id,
+            reserved__lte=F('quota') - quantity,
+        ).update(reserved=F('reserved') + quantity)
+        return bool(reserved) or not self.filter(
+            product_id=product_id
+        ).exists()
+
+    def release(self, product_id, quantity):
+        """Give back ``quantity`` reserved items of a product."""
+        return self.filter(product_id=product_id).update(
+            reserved=F('reserved') - quantity
+        )
+
+    def reconcile(self):
+        """Recompute the reserved items from the cart lines.
+
+        Return the number of drifted quotas, once they have been fixed.
+        """
+        ShoppingCartLine = apps.get_model('preorders', 'ShoppingCartLine')
+        reserved = ShoppingCartLine.objects.filter(
+            product=OuterRef('product')
+        ).values('product').annotate(
+            total_quantity=Sum('quantity')
+        ).values('total_quantity')
+        return self.exclude(
+            reserved=Coalesce(Subquery(reserved), 0)
+        ).update(reserved=Coalesce(Subquery(reserved), 0))
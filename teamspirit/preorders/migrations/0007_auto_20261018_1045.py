@@ -0,0 +1,45 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:45
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+
+def compute_totals(apps, schema_editor):
+    ShoppingCart = apps.get_model('preorders', 'ShoppingCart')
+    carts = ShoppingCart.objects.annotate(
+        amount=Coalesce(
+            Sum(
+                F('shoppingcartline__product__price')
+                * F('shoppingcartline__quantity'),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+        line_count=Count('shoppingcartline'),
+    )
+    for cart in carts:
+        cart.total_amount = cart.amount
+        cart.item_count = cart.line_count
+    ShoppingCart.objects.bulk_update(carts, ['total_amount', 'item_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preorders', '0006_auto_20200923_1022'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='item_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Nombre de lignes'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='total_amount',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Montant total'),
+        ),
+        migrations.RunPython(compute_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:46
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import Coalesce
+
+MAX_QUANTITY = 5
+
+logger = logging.getLogger(__name__)
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    ShoppingCart = apps.get_model('preorders', 'ShoppingCart')
+    ShoppingCartLine = apps.get_model('preorders', 'ShoppingCartLine')
+    duplicates = ShoppingCartLine.objects.values(
+        'shopping_cart_id',
+        'shopping_cart__user_id',
+        'product_id',
+        'size',
+    ).annotate(
+        kept_id=Min('id'),
+        total_quantity=Sum('quantity'),
+        lines=Count('id'),
+    ).filter(lines__gt=1)
+    cart_ids = set()
+    for duplicate in duplicates:
+        ShoppingCartLine.objects.filter(pk=duplicate['kept_id']).update(
+            quantity=min(duplicate['total_quantity'], MAX_QUANTITY)
+        )
+        if duplicate['total_quantity'] > MAX_QUANTITY:
+            # the excess is dropped: logged, to warn the users afterwards
+            logger.warning(
+                "Cart %s of user %s: product %s size %s merged from %s "
+                "to %s items.",
+                duplicate['shopping_cart_id'],
+                duplicate['shopping_cart__user_id'],
+                duplicate['product_id'],
+                duplicate['size'],
+                duplicate['total_quantity'],
+                MAX_QUANTITY,
+            )
+        ShoppingCartLine.objects.filter(
+            shopping_cart_id=duplicate['shopping_cart_id'],
+            product_id=duplicate['product_id'],
+            size=duplicate['size'],
+        ).exclude(pk=duplicate['kept_id']).delete()
+        cart_ids.add(duplicate['shopping_cart_id'])
+    # the merged carts may have different totals now
+    carts = ShoppingCart.objects.filter(pk__in=cart_ids).annotate(
+        amount=Coalesce(
+            Sum(
+                F('shoppingcartline__product__price')
+                * F('shoppingcartline__quantity'),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+        line_count=Count('shoppingcartline'),
+    )
+    for cart in carts:
+        cart.total_amount = cart.amount
+        cart.item_count = cart.line_count
+    ShoppingCart.objects.bulk_update(carts, ['total_amount', 'item_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preorders', '0007_auto_20261018_1045'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preorders', '0008_merge_duplicate_lines'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='shoppingcartline',
+            constraint=models.UniqueConstraint(fields=('shopping_cart', 'product', 'size'), name='unique_shopping_cart_product_size'),
+        ),
+    ]
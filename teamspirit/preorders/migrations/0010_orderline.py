@@ -0,0 +1,29 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0005_remove_product_has_different_sizes'),
+        ('preorders', '0009_auto_20261018_1046'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=50, verbose_name='Article')),
+                ('size', models.CharField(choices=[('XS', 'XS'), ('S', 'S'), ('M', 'M'), ('L', 'L'), ('XL', 'XL')], max_length=2, verbose_name='Taille')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantité')),
+                ('unit_price', models.IntegerField(verbose_name='Prix unitaire')),
+                ('amount', models.IntegerField(verbose_name='Montant de la ligne')),
+                ('ordered_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de commande')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='catalogs.Product')),
+                ('shopping_cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='preorders.ShoppingCart')),
+            ],
+        ),
+    ]
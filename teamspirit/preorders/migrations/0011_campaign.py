@@ -0,0 +1,45 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('preorders', '0010_orderline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='Campagne de pré-commande', max_length=50, verbose_name='Nom de la campagne')),
+                ('opens_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Ouverture')),
+                ('closes_at', models.DateTimeField(blank=True, null=True, verbose_name='Clôture')),
+                ('is_archived', models.BooleanField(default=False, verbose_name='Archivée ?')),
+            ],
+            options={
+                'ordering': ['-opens_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='campaign',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='preorders.Campaign'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcartline',
+            name='campaign',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='preorders.Campaign'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:55
+
+from django.db import migrations
+
+
+def assign_campaign(apps, schema_editor):
+    Campaign = apps.get_model('preorders', 'Campaign')
+    ShoppingCart = apps.get_model('preorders', 'ShoppingCart')
+    ShoppingCartLine = apps.get_model('preorders', 'ShoppingCartLine')
+    if not ShoppingCart.objects.exists():
+        return
+    # the existing carts belong to a first campaign
+    campaign = Campaign.objects.create()
+    ShoppingCart.objects.update(campaign=campaign)
+    ShoppingCartLine.objects.update(campaign=campaign)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preorders', '0011_campaign'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_campaign, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('preorders', '0012_assign_campaign'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='campaign',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='preorders.Campaign'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcartline',
+            name='campaign',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='preorders.Campaign'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('campaign', 'user'), name='unique_campaign_user'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingcartline',
+            index=models.Index(fields=['campaign', 'product'], name='line_campaign_product_idx'),
+        ),
+    ]
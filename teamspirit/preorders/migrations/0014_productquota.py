@@ -0,0 +1,24 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0005_remove_product_has_different_sizes'),
+        ('preorders', '0013_auto_20261018_1055'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductQuota',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quota', models.PositiveIntegerField(verbose_name='Quantité disponible')),
+                ('reserved', models.IntegerField(default=0, editable=False, verbose_name='Quantité réservée')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quota', to='catalogs.Product')),
+            ],
+        ),
+    ]
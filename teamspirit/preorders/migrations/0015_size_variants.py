@@ -0,0 +1,54 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:16
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+# the sizes offered by every product until now
+FORMER_SIZES = ['XS', 'S', 'M', 'L', 'XL']
+
+
+def create_size_variants(apps, schema_editor):
+    Product = apps.get_model('catalogs', 'Product')
+    ProductVariant = apps.get_model('catalogs', 'ProductVariant')
+    ShoppingCartLine = apps.get_model('preorders', 'ShoppingCartLine')
+    reserved = {
+        (row['product_id'], row['size']): row['total_quantity']
+        for row in ShoppingCartLine.objects.values(
+            'product_id',
+            'size',
+        ).annotate(total_quantity=Sum('quantity'))
+    }
+    ProductVariant.objects.bulk_create([
+        ProductVariant(
+            product_id=product_id,
+            size=size,
+            reserved=reserved.get((product_id, size), 0),
+        )
+        for product_id in Product.objects.values_list('pk', flat=True)
+        for size in FORMER_SIZES
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0013_productvariant'),
+        ('preorders', '0014_productquota'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderline',
+            name='size',
+            field=models.CharField(max_length=10, verbose_name='Taille'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcartline',
+            name='size',
+            field=models.CharField(max_length=10, verbose_name='Taille'),
+        ),
+        migrations.RunPython(
+            create_size_variants,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -1,17 +1,74 @@
 """Contain the models related to the app ``preorders``."""
 
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from teamspirit.catalogs.models import Product
-from teamspirit.preorders.managers import ShoppingCartLineManager, ShoppingCartManager  # noqa
+from teamspirit.preorders.managers import (
+    CampaignManager,
+    OrderLineManager,
+    ProductQuotaManager,
+    ShoppingCartLineManager,
+    ShoppingCartManager,
+)
 from teamspirit.users.models import User
 
 
+class Campaign(models.Model):
+    """Contain preorder campaign information."""
+
+    name = models.CharField(
+        max_length=50,
+        verbose_name='Nom de la campagne',
+        null=False,
+        blank=False,
+        default='Campagne de pré-commande',
+    )
+    opens_at = models.DateTimeField(
+        verbose_name='Ouverture',
+        null=False,
+        blank=False,
+        default=timezone.now,
+    )
+    closes_at = models.DateTimeField(
+        verbose_name='Clôture',
+        null=True,
+        blank=True,
+    )
+    is_archived = models.BooleanField(
+        verbose_name='Archivée ?',
+        default=False,
+    )
+
+    objects = CampaignManager()
+
+    class Meta:
+        ordering = ['-opens_at']
+
+    def __str__(self):
+        return f"{self.name}"
+
+    def is_running(self):
+        """Return whether the preorders are accepted right now."""
+        now = timezone.now()
+        return not self.is_archived and self.opens_at <= now and (
+            self.closes_at is None or now < self.closes_at
+        )
+
+
 class ShoppingCart(models.Model):
     """Contain shopping cart information."""
 
-    user = models.OneToOneField(
+    campaign = models.ForeignKey(
+        to=Campaign,
+        on_delete=models.CASCADE,
+        null=False,
+        blank=False,
+    )
+    user = models.ForeignKey(
         to=User,
         on_delete=models.CASCADE,
         null=False,
@@ -20,25 +77,64 @@ class ShoppingCart(models.Model):
     is_open = models.BooleanField(
         default=True,
     )
+    # denormalized totals, maintained by ``teamspirit.preorders.signals``
+    total_amount = models.IntegerField(
+        verbose_name='Montant total',
+        default=0,
+        editable=False,
+    )
+    item_count = models.IntegerField(
+        verbose_name='Nombre de lignes',
+        default=0,
+        editable=False,
+    )
     objects = ShoppingCartManager()
 
+    class Meta:
+        constraints = [
+            # also the index of the carts of a campaign per user
+            models.UniqueConstraint(
+                fields=['campaign', 'user'],
+                name='unique_campaign_user',
+            ),
+        ]
+
     def __str__(self):
         return f"Pré-commande pour {self.user}"
 
+    def save(self, *args, **kwargs):
+        if self.campaign_id is None:
+            campaign = Campaign.objects.get_current()
+            if campaign is None:
+                raise ValidationError(
+                    "Aucune campagne de pré-commande n'est en cours."
+                )
+            self.campaign = campaign
+        super().save(*args, **kwargs)
+
+    def is_editable(self):
+        """Return whether lines can still be added, changed or dropped."""
+        return self.is_open and self.campaign.is_running()
+
     def get_cart_amount(self):
-        queryset = ShoppingCartLine.objects.filter(shopping_cart=self)
-        return sum([item.get_line_amount() for item in queryset])
+        return self.total_amount
+
+    @cached_property
+    def lines(self):
+        """Return the lines of the cart with their product, fetched once."""
+        return list(
+            ShoppingCartLine.objects.filter(
+                shopping_cart=self
+            ).select_related('product').prefetch_related(
+                'product__image_variants'
+            )
+        )
 
 
 class ShoppingCartLine(models.Model):
     """Contain shopping cart information."""
 
-    class Size(models.TextChoices):
-        EXTRASMALL = 'XS', 'XS'
-        SMALL = 'S', 'S'
-        MEDIUM = 'M', 'M'
-        LARGE = 'L', 'L'
-        EXTRALARGE = 'XL', 'XL'
+    MAX_QUANTITY = 5
 
     shopping_cart = models.ForeignKey(
         to=ShoppingCart,
@@ -46,6 +142,14 @@ class ShoppingCartLine(models.Model):
         null=False,
         blank=False,
     )
+    # copied from the cart, to query the lines of a campaign directly
+    campaign = models.ForeignKey(
+        to=Campaign,
+        on_delete=models.CASCADE,
+        null=False,
+        blank=False,
+        editable=False,
+    )
     product = models.ForeignKey(
         to=Product,
         on_delete=models.CASCADE,
@@ -53,15 +157,15 @@ class ShoppingCartLine(models.Model):
         blank=False,
     )
     quantity = models.PositiveIntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_QUANTITY)],
         verbose_name='Quantité',
         default=1,
         null=False,
         blank=False,
     )
+    # one of the ``ProductVariant`` sizes of the product
     size = models.CharField(
-        max_length=2,
-        choices=Size.choices,
+        max_length=10,
         verbose_name='Taille',
         null=False,
         blank=False,
@@ -69,5 +173,118 @@ class ShoppingCartLine(models.Model):
 
     objects = ShoppingCartLineManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shopping_cart', 'product', 'size'],
+                name='unique_shopping_cart_product_size',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['campaign', 'product'],
+                name='line_campaign_product_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.campaign_id is None:
+            self.campaign_id = self.shopping_cart.campaign_id
+        super().save(*args, **kwargs)
+
     def get_line_amount(self):
-        return self.product.price * self.quantity
+        return (self.product.price or 0) * self.quantity
+
+
+class OrderLine(models.Model):
+    """Contain a snapshot of a shopping cart line, once the cart is closed."""
+
+    shopping_cart = models.ForeignKey(
+        to=ShoppingCart,
+        on_delete=models.CASCADE,
+        null=False,
+        blank=False,
+    )
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    product_name = models.CharField(
+        max_length=50,
+        verbose_name='Article',
+        null=False,
+        blank=False,
+    )
+    size = models.CharField(
+        max_length=10,
+        verbose_name='Taille',
+        null=False,
+        blank=False,
+    )
+    quantity = models.PositiveIntegerField(
+        verbose_name='Quantité',
+        null=False,
+        blank=False,
+    )
+    unit_price = models.IntegerField(
+        verbose_name='Prix unitaire',
+        null=False,
+        blank=False,
+    )
+    amount = models.IntegerField(
+        verbose_name='Montant de la ligne',
+        null=False,
+        blank=False,
+    )
+    ordered_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date de commande',
+    )
+
+    objects = OrderLineManager()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name} ({self.size})"
+
+    @classmethod
+    def from_shopping_cart_line(cls, line):
+        """Return an unsaved snapshot of ``line``."""
+        return cls(
+            shopping_cart_id=line.shopping_cart_id,
+            product_id=line.product_id,
+            product_name=line.product.name,
+            size=line.size,
+            quantity=line.quantity,
+            unit_price=line.product.price or 0,
+            amount=line.get_line_amount(),
+        )
+
+
+class ProductQuota(models.Model):
+    """Contain the limited quantity of a product, and its reserved items."""
+
+    product = models.OneToOneField(
+        to=Product,
+        on_delete=models.CASCADE,
+        null=False,
+        blank=False,
+        related_name='quota',
+    )
+    quota = models.PositiveIntegerField(
+        verbose_name='Quantité disponible',
+        null=False,
+        blank=False,
+    )
+    # maintained by ``ProductQuotaManager.reserve()`` and ``release()``
+    reserved = models.IntegerField(
+        verbose_name='Quantité réservée',
+        default=0,
+        editable=False,
+    )
+
+    objects = ProductQuotaManager()
+
+    def __str__(self):
+        return f"{self.product} : {self.reserved} / {self.quota}"
@@ -0,0 +1,138 @@
+"""Keep the denormalized totals of ``ShoppingCart`` up to date.
+
+The totals are shifted with ``F()`` expressions, so that concurrent
+requests cannot overwrite each other. Bulk operations (``update()``,
+``bulk_create()``...) do not send these signals: use the command
+``reconcile_cart_totals`` after such operations.
+"""
+
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from teamspirit.catalogs.models import Product, ProductVariant
+from teamspirit.preorders.cache import (
+    invalidate_cart_item_count,
+    invalidate_current_campaign,
+)
+from teamspirit.preorders.models import (
+    Campaign,
+    ProductQuota,
+    ShoppingCart,
+    ShoppingCartLine,
+)
+
+
+def _cart_user_id(line):
+    """Return the id of the user owning the cart of ``line``."""
+    if ShoppingCartLine.shopping_cart.is_cached(line):
+        return line.shopping_cart.user_id
+    return ShoppingCart.objects.filter(
+        pk=line.shopping_cart_id
+    ).values_list('user_id', flat=True).first()
+
+
+def _refresh_cached_cart(line):
+    """Reload the totals of the cart instance attached to ``line``."""
+    if ShoppingCartLine.shopping_cart.is_cached(line):
+        line.shopping_cart.refresh_from_db(
+            fields=['total_amount', 'item_count']
+        )
+
+
+@receiver(pre_save, sender=ShoppingCartLine)
+def remember_previous_line(sender, instance, **kwargs):
+    instance._previous_line = None
+    if instance.pk is not None:
+        instance._previous_line = ShoppingCartLine.objects.filter(
+            pk=instance.pk
+        ).values('shopping_cart_id', 'quantity', 'product__price').first()
+
+
+@receiver(post_save, sender=ShoppingCartLine)
+def add_line_to_totals(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_line', None)
+    if previous is not None:
+        ShoppingCart.objects.shift_totals(
+            previous['shopping_cart_id'],
+            amount=-(previous['product__price'] or 0) * previous['quantity'],
+            count=-1,
+        )
+    ShoppingCart.objects.shift_totals(
+        instance.shopping_cart_id,
+        amount=instance.get_line_amount(),
+        count=1,
+    )
+    _refresh_cached_cart(instance)
+
+
+@receiver(post_delete, sender=ShoppingCartLine)
+def remove_line_from_totals(sender, instance, **kwargs):
+    ShoppingCart.objects.shift_totals(
+        instance.shopping_cart_id,
+        amount=-instance.get_line_amount(),
+        count=-1,
+    )
+    _refresh_cached_cart(instance)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_price(sender, instance, **kwargs):
+    instance._previous_price = None
+    if instance.pk is not None:
+        instance._previous_price = Product.objects.filter(
+            pk=instance.pk
+        ).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+def propagate_price_to_totals(sender, instance, created, **kwargs):
+    previous_price = getattr(instance, '_previous_price', None) or 0
+    delta = (instance.price or 0) - previous_price
+    if created or not delta:
+        return
+    # the totals of the closed carts are those of their order lines
+    lines = ShoppingCartLine.objects.filter(
+        product=instance,
+        shopping_cart__is_open=True,
+    )
+    quantity = lines.filter(
+        shopping_cart=OuterRef('pk')
+    ).values('shopping_cart').annotate(
+        quantity=Sum('quantity')
+    ).values('quantity')
+    ShoppingCart.objects.filter(
+        pk__in=lines.values('shopping_cart_id')
+    ).update(
+        total_amount=F('total_amount') + delta * Subquery(
+            quantity,
+            output_field=IntegerField(),
+        )
+    )
+
+
+@receiver(post_save, sender=ShoppingCartLine)
+@receiver(post_delete, sender=ShoppingCartLine)
+def invalidate_cart_badge(sender, instance, **kwargs):
+    # after the commit, so that no concurrent request caches the old count
+    user_id = _cart_user_id(instance)
+    transaction.on_commit(
+        lambda: invalidate_cart_item_count(user_id, instance.campaign_id)
+    )
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+def invalidate_campaign(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_current_campaign)
+
+
+@receiver(post_delete, sender=ShoppingCartLine)
+def release_quota(sender, instance, **kwargs):
+    ProductQuota.objects.release(instance.product_id, instance.quantity)
+    ProductVariant.objects.release(
+        instance.product_id,
+        instance.size,
+        instance.quantity
+    )
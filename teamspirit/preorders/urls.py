@@ -3,7 +3,10 @@ from django.urls import path
 from teamspirit.preorders.views import (
     add_to_cart_view,
     drop_from_cart_view,
+    edit_cart_view,
+    preorders_export_view,
     shopping_cart_view,
+    supplier_order_view,
 )
 
 app_name = 'preorders'
@@ -14,6 +17,11 @@ urlpatterns = [
         shopping_cart_view,
         name='shopping_cart'
     ),
+    path(
+        'edit/',
+        edit_cart_view,
+        name='edit_cart'
+    ),
     path(
         'add_product/<int:product_id>/',
         add_to_cart_view,
@@ -24,4 +32,14 @@ urlpatterns = [
         drop_from_cart_view,
         name='drop_from_cart'
     ),
+    path(
+        'supplier_order/',
+        supplier_order_view,
+        name='supplier_order'
+    ),
+    path(
+        'export/',
+        preorders_export_view,
+        name='preorders_export'
+    ),
 ]
@@ -1,11 +1,64 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.urls import reverse_lazy
+from django.core.cache import cache
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils.functional import cached_property
 from django.views.generic import ListView
 from django.views.generic.edit import FormView
 
 from teamspirit.catalogs.models import Product
-from teamspirit.preorders.forms import AddToCartForm, DropFromCartForm
-from teamspirit.preorders.models import ShoppingCart, ShoppingCartLine
+from teamspirit.preorders.carts import get_shopping_cart
+from teamspirit.preorders.forms import (
+    AddToCartForm,
+    DropFromCartForm,
+    ShoppingCartLineFormSet,
+)
+from teamspirit.preorders.managers import SUPPLIER_ORDER_HEADER
+from teamspirit.preorders.models import Campaign, ShoppingCartLine
+from teamspirit.utils.streaming import csv_response
+
+PREORDERS_EXPORT_HEADER = [
+    'Adhérent', 'Article', 'Taille', 'Quantité', 'Montant'
+]
+EXPORT_CHUNK_SIZE = 2000
+
+
+class IdempotentFormMixin:
+    """Ignore the replayed submissions of a form.
+
+    The ``idempotency_key`` posted with the form is reserved in the cache
+    before the form is processed, so that a retried or double submission
+    is redirected as the first one, without being validated nor saved.
+    """
+
+    idempotency_timeout = 60 * 60
+
+    def get_idempotency_cache_key(self):
+        key = self.request.POST.get('idempotency_key')
+        if not key:
+            return None
+        return (
+            f"preorders:idempotency:{self.request.user.pk}:"
+            f"{self.request.path}:{key}"
+        )
+
+    def post(self, request, *args, **kwargs):
+        cache_key = self.get_idempotency_cache_key()
+        if cache_key is None:
+            return super().post(request, *args, **kwargs)
+        if not cache.add(cache_key, '', self.idempotency_timeout):
+            # replayed submission: redirect as the original one
+            url = cache.get(cache_key) or self.get_success_url()
+            return HttpResponseRedirect(url)
+        response = super().post(request, *args, **kwargs)
+        if isinstance(response, HttpResponseRedirect):
+            cache.set(cache_key, response.url, self.idempotency_timeout)
+        else:
+            # invalid form: let the member submit it again
+            cache.delete(cache_key)
+        return response
 
 
 class ShoppingCartView(ListView):
@@ -15,43 +68,88 @@ class ShoppingCartView(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['shopping_cart_amount'] = ShoppingCart.objects.get_or_create(
-            user=self.request.user
-        )[0].get_cart_amount()
+        shopping_cart = get_shopping_cart(self.request)
+        context['shopping_cart_amount'] = (
+            shopping_cart.get_cart_amount() if shopping_cart else 0
+        )
+        context['preorders_closed'] = not (
+            shopping_cart and shopping_cart.is_editable()
+        )
         return context
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        shopping_cart = ShoppingCart.objects.get_or_create(
-            user=self.request.user
-        )[0]
-        queryset = ShoppingCartLine.objects.filter(
-            shopping_cart=shopping_cart
-        )
-        return queryset
+        shopping_cart = get_shopping_cart(self.request)
+        if shopping_cart is None:
+            # no current campaign
+            return []
+        return shopping_cart.lines
 
 
 shopping_cart_view = ShoppingCartView.as_view()
 shopping_cart_view = login_required(shopping_cart_view)
 
 
-class AddToCartView(FormView):
+@login_required
+def edit_cart_view(request):
+    shopping_cart = get_shopping_cart(request)
+    if shopping_cart is None or not shopping_cart.is_editable():
+        return redirect(reverse_lazy('preorders:shopping_cart'))
+    queryset = ShoppingCartLine.objects.filter(
+        shopping_cart=shopping_cart
+    ).select_related('product').prefetch_related(
+        'product__variants'
+    ).order_by('pk')
+    if request.method == 'POST':
+        formset = ShoppingCartLineFormSet(request.POST, queryset=queryset)
+        if formset.is_valid() and formset.save() is not None:
+            return redirect(reverse_lazy('preorders:shopping_cart'))
+    else:
+        formset = ShoppingCartLineFormSet(queryset=queryset)
+    return render(
+        request,
+        'preorders/edit_cart.html',
+        {'formset': formset},
+    )
+
+
+class AddToCartView(IdempotentFormMixin, FormView):
 
     template_name = "preorders/add_to_cart.html"
     form_class = AddToCartForm
-    success_url = reverse_lazy('catalogs:catalog')
+
+    def dispatch(self, request, *args, **kwargs):
+        if get_shopping_cart(request) is None:
+            # no current campaign: the cart tells that preorders are closed
+            return redirect(reverse_lazy('preorders:shopping_cart'))
+        if not self.product.available_sizes():
+            # nothing can be ordered: back to the catalog
+            return redirect(self.get_success_url())
+        return super().dispatch(request, *args, **kwargs)
+
+    @cached_property
+    def product(self):
+        return get_object_or_404(
+            Product.objects.prefetch_related('variants'),
+            id=self.kwargs['product_id']
+        )
+
+    def get_success_url(self):
+        return reverse('catalogs:catalog', args=[self.product.catalog_id])
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['shopping_cart'] = get_shopping_cart(self.request)
+        kwargs['product'] = self.product
+        return kwargs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['product'] = Product.objects.get(id=self.kwargs['product_id'])
+        context['product'] = self.product
         return context
 
     def get_initial(self):
         initial = super().get_initial()
-        initial['shopping_cart'] = ShoppingCart.objects.get_or_create(
-            user=self.request.user
-        )[0]
-        initial['product'] = Product.objects.get(id=self.kwargs['product_id'])
+        initial['product'] = self.product
         return initial
 
 
@@ -59,30 +157,78 @@ add_to_cart_view = AddToCartView.as_view()
 add_to_cart_view = login_required(add_to_cart_view)
 
 
-class DropFromCartView(FormView):
+class DropFromCartView(IdempotentFormMixin, FormView):
 
     template_name = "preorders/drop_from_cart.html"
     form_class = DropFromCartForm
     success_url = reverse_lazy('preorders:shopping_cart')
 
+    @cached_property
+    def shopping_cart_line(self):
+        # /!\ only the lines of the request user can be found
+        return get_object_or_404(
+            ShoppingCartLine.objects.select_related(
+                'shopping_cart__campaign',
+                'product'
+            ),
+            id=self.kwargs['line_id'],
+            shopping_cart__user=self.request.user,
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['shopping_cart_line'] = ShoppingCartLine.objects.get(
-            id=self.kwargs['line_id']
-        )
+        context['shopping_cart_line'] = self.shopping_cart_line
         return context
 
     def get_form_kwargs(self):
         kwargs = super(DropFromCartView, self).get_form_kwargs()
-        kwargs.update({'request_user': self.request.user})
-        kwargs.update({'line_id': self.kwargs['line_id']})
-        kwargs.update({
-            'shopping_cart_line': ShoppingCartLine.objects.get(
-                id=self.kwargs['line_id']
-            )
-        })
+        kwargs.update({'shopping_cart_line': self.shopping_cart_line})
         return kwargs
 
 
 drop_from_cart_view = DropFromCartView.as_view()
 drop_from_cart_view = login_required(drop_from_cart_view)
+
+
+@staff_member_required
+def supplier_order_view(request):
+    # the report covers a single campaign, the current one by default
+    campaign_id = request.GET.get('campaign')
+    if campaign_id:
+        try:
+            campaign_id = int(campaign_id)
+        except ValueError:
+            raise Http404("Campagne introuvable.")
+        campaign = get_object_or_404(Campaign, pk=campaign_id)
+    else:
+        campaign = Campaign.objects.get_current()
+        if campaign is None:
+            raise Http404("Aucune campagne de pré-commande en cours.")
+    return csv_response(
+        ShoppingCartLine.objects.supplier_order(campaign),
+        filename='commande_fournisseur.csv',
+        header=SUPPLIER_ORDER_HEADER,
+    )
+
+
+@staff_member_required
+def preorders_export_view(request):
+    lines = ShoppingCartLine.objects.select_related(
+        'shopping_cart__user',
+        'product',
+    ).order_by('shopping_cart__user__last_name', 'pk')
+    rows = (
+        [
+            str(line.shopping_cart.user),
+            line.product.name,
+            line.size,
+            line.quantity,
+            line.get_line_amount(),
+        ]
+        for line in lines.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return csv_response(
+        rows,
+        filename='pre-commandes.csv',
+        header=PREORDERS_EXPORT_HEADER,
+    )
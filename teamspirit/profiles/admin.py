@@ -2,5 +2,16 @@ from django.contrib import admin
 
 from teamspirit.profiles.models import Personal, Role
 
-admin.site.register(Personal)
+
+class PersonalAdmin(admin.ModelAdmin):
+
+    list_display = ('__str__', 'phone_number', 'address')
+    list_select_related = ('address',)
+
+    def get_queryset(self, request):
+        # the users are named by ``Personal.__str__()``: fetch them at once
+        return super().get_queryset(request).with_user()
+
+
+admin.site.register(Personal, PersonalAdmin)
 admin.site.register(Role)
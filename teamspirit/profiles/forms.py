@@ -236,6 +236,8 @@ class AddMedicalFileForm(ModelForm):
     def save(self, commit=True):
         medical_file = self.cleaned_data["medical_file"]
         if commit and medical_file:
+            # the file is named after the user, already known here
+            self.user.personal.user = self.user
             self.user.personal.medical_file = medical_file
             self.user.personal.save()
         return self.user.personal
@@ -269,6 +271,8 @@ class AddIdFileForm(ModelForm):
     def save(self, commit=True):
         id_file = self.cleaned_data["id_file"]
         if commit and id_file:
+            # the file is named after the user, already known here
+            self.user.personal.user = self.user
             self.user.personal.id_file = id_file
             self.user.personal.save()
         return self.user.personal
@@ -1,13 +1,20 @@
 """Contain the managers for the models in app ``profiles``."""
 
 from django.db import models
+from django.db.models import Prefetch
 
-from teamspirit.users.models import User
 
+class PersonalQuerySet(models.QuerySet):
+    """Query the model ``Personal``."""
 
-class PersonalManager(models.Manager):
-    """Manage the model ``Personal``."""
-    # pass
+    def with_user(self):
+        """Fetch the user of all the personal information in one query.
+
+        See ``Personal.user``.
+        """
+        return self.prefetch_related(
+            Prefetch('user_set', to_attr='_prefetched_users')
+        )
 
 
 class RoleManager(models.Manager):
@@ -15,11 +22,18 @@ class RoleManager(models.Manager):
     # pass
 
 
+def _user_folder(instance):
+    """Return the folder of the files of a user, by name."""
+    user = instance.user
+    if user is None:
+        # personal information which no user has yet
+        return "sans_utilisateur"
+    return f"{user.last_name}_{user.first_name}"
+
+
 def rename_id_file(instance, file_name):
-    user = User.objects.get(personal=instance.id)
-    return f"id/{user.last_name}_{user.first_name}/{file_name}"
+    return f"id/{_user_folder(instance)}/{file_name}"
 
 
 def rename_medical_file(instance, file_name):
-    user = User.objects.get(personal=instance.id)
-    return f"lic/{user.last_name}_{user.first_name}/{file_name}"
+    return f"lic/{_user_folder(instance)}/{file_name}"
@@ -1,10 +1,11 @@
 """Contain the models related to the app ``profiles``."""
 
 from django.db import models, transaction
+from django.utils.functional import cached_property
 
 from teamspirit.core.models import Address
 from teamspirit.profiles.managers import (
-    PersonalManager,
+    PersonalQuerySet,
     RoleManager,
     rename_id_file,
     rename_medical_file,
@@ -46,14 +47,28 @@ class Personal(models.Model):
         upload_to=rename_medical_file,
     )
 
-    objects = PersonalManager()
+    objects = PersonalQuerySet.as_manager()
 
     def __str__(self):
-        user = User.objects.get(personal=self.id)
+        user = self.user
+        if user is None:
+            return "Informations personnelles sans utilisateur"
         result = "Informations personnelles pour " + \
             f"{user.first_name} {user.last_name}"
         return result
 
+    @cached_property
+    def user(self):
+        """Return the user of these personal information, fetched once.
+
+        The users of a list are fetched together by
+        ``PersonalQuerySet.with_user()``; the upload forms set it directly.
+        Return ``None`` if no user has these personal information.
+        """
+        if hasattr(self, '_prefetched_users'):
+            return next(iter(self._prefetched_users), None)
+        return User.objects.filter(personal=self.id).first()
+
 
 class Role(models.Model):
     """Qualify user's role."""
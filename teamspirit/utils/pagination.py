@@ -0,0 +1,119 @@
+"""Contain the helpers to paginate on a key, instead of an offset."""
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """Contain a page of objects, and the cursors to its neighbours.
+
+    The rows are only read when the page is first used, so that a page
+    rendered from a cached fragment costs no query.
+    """
+
+    def __init__(self, queryset, fields, page_size, after=None, before=None):
+        self.queryset = queryset
+        self.fields = fields
+        self.page_size = page_size
+        self.after = after
+        self.before = before
+
+    @cached_property
+    def _page(self):
+        """Return the rows, and whether there are previous and next rows."""
+        fields, page_size = self.fields, self.page_size
+        if self.before is not None:
+            rows = list(
+                self.queryset.filter(
+                    _beyond(fields, self.before, 'lt')
+                ).order_by(
+                    *(f'-{field}' for field in fields)
+                )[:page_size + 1]
+            )
+            has_previous, has_next = len(rows) > page_size, True
+            rows = rows[:page_size][::-1]
+        else:
+            queryset = self.queryset
+            if self.after is not None:
+                queryset = queryset.filter(_beyond(fields, self.after, 'gt'))
+            rows = list(queryset.order_by(*fields)[:page_size + 1])
+            has_previous = self.after is not None
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+        return rows, has_previous and bool(rows), has_next and bool(rows)
+
+    @property
+    def object_list(self):
+        return self._page[0]
+
+    @property
+    def previous_cursor(self):
+        if self._page[1]:
+            return encode_cursor(self.object_list[0], self.fields)
+        return None
+
+    @property
+    def next_cursor(self):
+        if self._page[2]:
+            return encode_cursor(self.object_list[-1], self.fields)
+        return None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+def encode_cursor(obj, fields):
+    """Return the cursor of ``obj``, e.g. ``'3-42'``.
+
+    ``obj`` is a model instance, or a dict from ``QuerySet.values()``.
+    """
+    if isinstance(obj, dict):
+        return '-'.join(str(obj[field]) for field in fields)
+    return '-'.join(str(getattr(obj, field)) for field in fields)
+
+
+def decode_cursor(cursor, fields):
+    """Return the key values of ``cursor``, or ``None`` if it is empty.
+
+    Raise ``ValueError`` if the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    values = tuple(int(value) for value in cursor.split('-'))
+    if len(values) != len(fields):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values
+
+
+def _beyond(fields, values, lookup):
+    """Return the condition of the rows beyond ``values``, in key order."""
+    condition = Q()
+    for index, field in enumerate(fields):
+        condition |= Q(
+            **dict(zip(fields[:index], values[:index])),
+            **{f'{field}__{lookup}': values[index]},
+        )
+    return condition
+
+
+def paginate_keyset(queryset, fields, page_size, after=None, before=None):
+    """Return the page of ``queryset`` after (or before) a key.
+
+    The rows are ordered on ``fields``, which must be unique together, and
+    the page is read with a ``WHERE`` on the key instead of an ``OFFSET``:
+    deep pages cost no more than the first one, given an index on
+    ``fields``.
+    """
+    return KeysetPage(queryset, fields, page_size, after, before)
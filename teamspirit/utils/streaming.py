@@ -0,0 +1,31 @@
+"""Contain the helpers to stream large responses."""
+
+import csv
+
+from django.http import StreamingHttpResponse
+
+
+class Echo:
+    """Return what is written, instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header=None):
+    """Yield the CSV lines of ``rows`` one at a time."""
+    writer = csv.writer(Echo(), delimiter=';')
+    if header is not None:
+        yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(rows, filename, header=None):
+    """Return a streamed CSV attachment, built while it is sent."""
+    response = StreamingHttpResponse(
+        stream_csv(rows, header),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -27,6 +27,7 @@ import re
 
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options
@@ -35,9 +36,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from seleniumlogin import force_login
 from webdriver_manager.firefox import GeckoDriverManager
 
-from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
 from teamspirit.core.models import Address
-from teamspirit.preorders.models import ShoppingCart
+from teamspirit.preorders.models import Campaign, ShoppingCart
 from teamspirit.profiles.models import Personal
 from teamspirit.users.models import User
 
@@ -82,6 +83,8 @@ class NoStaffUserStoriesAuthenticatedTestCase(StaticLiveServerTestCase):
         # force login for this user
         force_login(self.user, self.driver, self.live_server_url)
         # some other data
+        # the current campaign
+        Campaign.objects.create()
         self.shopping_cart = ShoppingCart.objects.create(
             user=self.user,
         )
@@ -106,6 +109,10 @@ class NoStaffUserStoriesAuthenticatedTestCase(StaticLiveServerTestCase):
             price=100,
             catalog=self.catalog,
         )
+        # the sizes of the products
+        ProductVariant.objects.create_defaults(
+            [self.product_a.pk, self.product_b.pk]
+        )
 
     @classmethod
     def tearDownClass(cls):
@@ -461,7 +468,10 @@ class NoStaffUserStoriesAuthenticatedTestCase(StaticLiveServerTestCase):
     def test_consult_catalog_items(self):
         """US007-AT01: consult the catalog items."""
         # request the catalog page
-        start_url = self.home_url + "catalog/"
+        start_url = self.live_server_url + reverse(
+            'catalogs:catalog',
+            args=[self.catalog.id]
+        )
         self.driver.get(start_url)
         # count the number of products
         products_list = self.driver.find_elements_by_link_text(
@@ -472,7 +482,10 @@ class NoStaffUserStoriesAuthenticatedTestCase(StaticLiveServerTestCase):
     def test_add_then_delete_a_product_from_shopping_cart(self):
         """US008-AT01: add then drop a product from shopping cart."""
         # request the catalog page
-        start_url = self.home_url + "catalog/"
+        start_url = self.live_server_url + reverse(
+            'catalogs:catalog',
+            args=[self.catalog.id]
+        )
         self.driver.get(start_url)
         # click on the first button "Ajouter au panier"
         add_to_cart_button = self.driver.find_elements_by_link_text(
@@ -3,6 +3,7 @@
 from django.test import TestCase
 from django.urls import reverse
 
+from teamspirit.catalogs.models import Catalog, Product
 from teamspirit.core.models import Address
 from teamspirit.profiles.models import Personal
 from teamspirit.users.models import User
@@ -33,13 +34,80 @@ class CatalogsIntegrationTestCase(TestCase):
         )
         # log this user in
         self.client.login(email="toto@mail.com", password="TopSecret")
+        # a catalog
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
 
     def test_catalog_view_with_url(self):
         """Integration test - app ``catalogs`` - view with url
 
         Test the catalog view with url.
         """
-        url = reverse('catalogs:catalog')
+        url = reverse('catalogs:catalog', args=[self.catalog.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'catalogs/catalog.html')
+
+    def test_catalog_index_view_with_url(self):
+        """Integration test - app ``catalogs`` - view with url #2
+
+        Test the catalog index view with url.
+        """
+        url = reverse('catalogs:index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'catalogs/catalog_index.html')
+        self.assertContains(
+            response,
+            reverse('catalogs:catalog', args=[self.catalog.id])
+        )
+
+    def test_catalog_view_conditional_get(self):
+        """Integration test - app ``catalogs`` - conditional get
+
+        Test that an unchanged catalog is not sent again.
+        """
+        product = Product.objects.create(name="Short", catalog=self.catalog)
+        url = reverse('catalogs:catalog', args=[self.catalog.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # a changed product changes the ETag
+        product.name = "Bermuda"
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        # so does a removed product
+        product.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_products_api_conditional_get(self):
+        """Integration test - app ``catalogs`` - api conditional get
+
+        Test that unchanged products are not sent again.
+        """
+        product = Product.objects.create(name="Short", catalog=self.catalog)
+        url = reverse('catalogs:api_products', args=[self.catalog.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['name'], "Short")
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        product.name = "Bermuda"
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        # the catalogs list changes with its products too
+        url = reverse('catalogs:api_catalogs')
+        etag = self.client.get(url)['ETag']
+        product.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['product_count'], 0)
@@ -4,9 +4,14 @@ from django.core.files.uploadedfile import UploadedFile
 from django.test import TestCase
 from django.urls import reverse
 
-from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
 from teamspirit.core.models import Address
-from teamspirit.preorders.models import ShoppingCart, ShoppingCartLine
+from teamspirit.preorders.models import (
+    Campaign,
+    ProductQuota,
+    ShoppingCart,
+    ShoppingCartLine,
+)
 from teamspirit.profiles.models import Personal
 from teamspirit.users.models import User
 
@@ -37,6 +42,8 @@ class PreordersIntegrationTestCase(TestCase):
         # log this user in
         self.client.login(email="toto@mail.com", password="TopSecret")
         # some other data
+        # the current campaign
+        Campaign.objects.create()
         self.shopping_cart = ShoppingCart.objects.create(
             user=self.user,
         )
@@ -52,6 +59,11 @@ class PreordersIntegrationTestCase(TestCase):
             price=25,
             catalog=self.catalog,
         )
+        # the sizes of the product
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=self.product, size=size)
+            for size in ['XS', 'S', 'M', 'L', 'XL']
+        ])
         self.shopping_cart_line = ShoppingCartLine.objects.create(
             shopping_cart=self.shopping_cart,
             product=self.product,
@@ -94,3 +106,270 @@ class PreordersIntegrationTestCase(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'preorders/drop_from_cart.html')
+
+    def test_edit_cart_view_with_url(self):
+        """Integration test - app ``preorders`` - view with url #6
+
+        Test the 'edit cart' view with url.
+        """
+        other_line = ShoppingCartLine.objects.create(
+            shopping_cart=self.shopping_cart,
+            product=self.product,
+            quantity=1,
+            size='M'
+        )
+        url = reverse('preorders:edit_cart')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'preorders/edit_cart.html')
+        data = {
+            'form-TOTAL_FORMS': 2,
+            'form-INITIAL_FORMS': 2,
+            'form-0-id': self.shopping_cart_line.id,
+            'form-0-quantity': 4,
+            'form-0-size': 'S',
+            'form-1-id': other_line.id,
+            'form-1-quantity': 1,
+            'form-1-size': 'L',
+        }
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('preorders:shopping_cart'))
+        self.assertEqual(
+            list(ShoppingCartLine.objects.order_by('pk').values_list(
+                'quantity',
+                'size',
+            )),
+            [(4, 'S'), (1, 'L')]
+        )
+        self.shopping_cart.refresh_from_db()
+        self.assertEqual(self.shopping_cart.total_amount, 25 * 5)
+
+    def test_edit_cart_view_failure(self):
+        """Integration test - app ``preorders`` - view with url #7
+
+        Test the 'edit cart' view with invalid quantity or sizes.
+        """
+        other_line = ShoppingCartLine.objects.create(
+            shopping_cart=self.shopping_cart,
+            product=self.product,
+            quantity=1,
+            size='M'
+        )
+        url = reverse('preorders:edit_cart')
+        data = {
+            'form-TOTAL_FORMS': 2,
+            'form-INITIAL_FORMS': 2,
+            'form-0-id': self.shopping_cart_line.id,
+            'form-0-quantity': 2,
+            'form-0-size': 'M',
+            'form-1-id': other_line.id,
+            'form-1-quantity': 1,
+            'form-1-size': 'M',
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].non_form_errors())
+        data['form-1-size'] = 'L'
+        data['form-1-quantity'] = 6
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].errors[1])
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.size, 'XS')
+
+    def test_edit_cart_view_sold_out(self):
+        """Integration test - app ``preorders`` - view with url #8
+
+        Test the 'edit cart' view beyond the quota of a product.
+        """
+        ProductQuota.objects.create(product=self.product, quota=3, reserved=2)
+        url = reverse('preorders:edit_cart')
+        data = {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': self.shopping_cart_line.id,
+            'form-0-quantity': 4,
+            'form-0-size': 'XS',
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].non_form_errors())
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.quantity, 2)
+        data['form-0-quantity'] = 3
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('preorders:shopping_cart'))
+        self.assertEqual(
+            ProductQuota.objects.get(product=self.product).reserved,
+            3
+        )
+
+    def test_edit_cart_view_change_size(self):
+        """Integration test - app ``preorders`` - view with url #9
+
+        Test that a changed size moves the items to the new size.
+        """
+        self.product.variants.filter(size='XS').update(reserved=2)
+        self.product.variants.filter(size='S').update(quota=2)
+        url = reverse('preorders:edit_cart')
+        data = {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': self.shopping_cart_line.id,
+            'form-0-quantity': 3,
+            'form-0-size': 'S',
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].non_form_errors())
+        data['form-0-quantity'] = 2
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('preorders:shopping_cart'))
+        self.assertEqual(
+            dict(self.product.variants.values_list('size', 'reserved')),
+            {'XS': 0, 'S': 2, 'M': 0, 'L': 0, 'XL': 0}
+        )
+
+    def test_edit_cart_view_closed_campaign(self):
+        """Integration test - app ``preorders`` - view with url #10
+
+        Test that the cart cannot be edited once the campaign is over.
+        """
+        campaign = self.shopping_cart.campaign
+        campaign.closes_at = campaign.opens_at
+        campaign.save()
+        url = reverse('preorders:edit_cart')
+        response = self.client.post(url, {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': self.shopping_cart_line.id,
+            'form-0-quantity': 1,
+            'form-0-size': 'XS',
+        })
+        self.assertRedirects(response, reverse('preorders:shopping_cart'))
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.quantity, 2)
+        response = self.client.get(reverse('preorders:shopping_cart'))
+        self.assertContains(response, "Les pré-commandes sont closes.")
+        self.assertNotContains(response, "Supprimer")
+
+    def test_add_to_cart_view_other_cart(self):
+        """Integration test - app ``preorders`` - view with url #2
+
+        Test that a posted cart id is ignored: the line goes into the cart
+        of the request user.
+        """
+        other_cart = ShoppingCart.objects.create(
+            user=User.objects.create_user(
+                email="titi@mail.com",
+                password="TopSecret",
+                personal=self.personal
+            ),
+        )
+        url = reverse(
+            'preorders:add_to_cart',
+            kwargs={'product_id': self.product.id}
+        )
+        response = self.client.post(url, {
+            'shopping_cart': other_cart.id,
+            'product': self.product.id,
+            'quantity': 1,
+            'size': 'M',
+        })
+        self.assertRedirects(
+            response,
+            reverse('catalogs:catalog', args=[self.catalog.id])
+        )
+        self.assertFalse(other_cart.shoppingcartline_set.exists())
+        self.assertTrue(
+            self.shopping_cart.shoppingcartline_set.filter(size='M').exists()
+        )
+
+    def test_add_to_cart_view_replayed_post(self):
+        """Integration test - app ``preorders`` - replayed post #1
+
+        Test that a replayed 'add to cart' submission is ignored.
+        """
+        url = reverse(
+            'preorders:add_to_cart',
+            kwargs={'product_id': self.product.id}
+        )
+        data = {
+            'shopping_cart': self.shopping_cart.id,
+            'product': self.product.id,
+            'quantity': 1,
+            'size': 'XS',
+            'idempotency_key': 'abc123',
+        }
+        for _ in range(2):
+            response = self.client.post(url, data)
+            self.assertRedirects(
+                response,
+                reverse('catalogs:catalog', args=[self.catalog.id])
+            )
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.quantity, 2 + 1)
+        # another submission of the form is processed
+        data['idempotency_key'] = 'def456'
+        self.client.post(url, data)
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.quantity, 2 + 1 + 1)
+
+    def test_drop_from_cart_view_replayed_post(self):
+        """Integration test - app ``preorders`` - replayed post #2
+
+        Test that a replayed 'drop from cart' submission is ignored.
+        """
+        url = reverse(
+            'preorders:drop_from_cart',
+            kwargs={'line_id': self.shopping_cart_line.id}
+        )
+        data = {'idempotency_key': 'ghi789'}
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('preorders:shopping_cart'))
+        self.assertFalse(ShoppingCartLine.objects.exists())
+        with self.assertNumQueries(2):  # session and user
+            response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('preorders:shopping_cart'))
+
+    def test_supplier_order_view_with_url(self):
+        """Integration test - app ``preorders`` - view with url #4
+
+        Test the supplier order view with url, for staff members only.
+        """
+        url = reverse('preorders:supplier_order')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode('utf8'),
+            "Article;Taille;Quantité;Montant\r\n"
+            "Débardeur homme;XS;2;50\r\n"
+        )
+        # an invalid or unknown campaign is not found
+        for campaign_id in ['abc', '²', '999']:
+            response = self.client.get(url, {'campaign': campaign_id})
+            self.assertEqual(response.status_code, 404)
+
+    def test_preorders_export_view_with_url(self):
+        """Integration test - app ``preorders`` - view with url #5
+
+        Test the preorders export view with url, for staff members only.
+        """
+        url = reverse('preorders:preorders_export')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode('utf8'),
+            "Adhérent;Article;Taille;Quantité;Montant\r\n"
+            "Toto ;Débardeur homme;XS;2;50\r\n"
+        )
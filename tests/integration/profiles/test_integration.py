@@ -1,6 +1,8 @@
 """Contain the integration tests in app ``profiles``."""
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from teamspirit.core.models import Address
@@ -212,3 +214,28 @@ class ProfilesIntegrationTestCase(TestCase):
             response,
             'profiles/drop_file.html'
         )
+
+    def test_personal_admin_num_queries(self):
+        """Integration test - app ``profiles`` - admin changelist
+
+        Test that the number of queries does not depend on the members.
+        """
+        self.user.is_staff = True
+        self.user.save()
+        url = reverse('admin:profiles_personal_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "Informations personnelles pour Toto")
+        for index in range(5):
+            User.objects.create_user(
+                email=f"user{index}@mail.com",
+                first_name=f"User{index}",
+                password="TopSecret",
+                personal=Personal.objects.create(
+                    phone_number="01 02 03 04 05",
+                    address=self.address
+                )
+            )
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertContains(response, "Informations personnelles pour User4")
@@ -3,4 +3,583 @@ This module contains the unit tests related to
 the managers in app ``catalogs``.
 """
 
-# from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+from zipfile import ZipFile
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+
+from teamspirit.catalogs.images import open_image
+from teamspirit.catalogs.models import (
+    Catalog,
+    ImageBlob,
+    Product,
+    ProductImageVariant,
+    ProductVariant,
+)
+from teamspirit.core.models import Address
+from teamspirit.preorders.models import (
+    Campaign,
+    ShoppingCart,
+    ShoppingCartLine,
+)
+from teamspirit.profiles.models import Personal
+from teamspirit.users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(width=800, height=600, name='photo.png'):
+    """Return an uploaded PNG image of the given size."""
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProductImageVariantManagerTestCase(TestCase):
+    """Test the manager ``ProductImageVariantManager``."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+
+    def test_generate_on_save(self):
+        """Unit test - app ``catalogs`` - ``ProductImageVariantManager``
+
+        Test the resized images generated when a product is saved.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        self.assertEqual(
+            list(product.image_variants.values_list('format', 'width')),
+            [
+                ('jpeg', 320), ('jpeg', 640), ('jpeg', 800),
+                ('webp', 320), ('webp', 640), ('webp', 800),
+            ]
+        )
+        variant = product.image_variants.get(format='webp', width=320)
+        with variant.file.open('rb') as file, Image.open(file) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (320, 240))
+        # a placeholder of 20 pixels, and the size of the image
+        self.assertTrue(
+            product.image_placeholder.startswith("data:image/jpeg;base64,")
+        )
+        self.assertLess(len(product.image_placeholder), 1000)
+        self.assertEqual(
+            (product.image_width, product.image_height),
+            (800, 600)
+        )
+        # saving again without a new image keeps the variants
+        product.name = "Débardeur femme"
+        product.save()
+        self.assertIn(variant, product.image_variants.all())
+
+    def test_generate_for_invalid_image(self):
+        """Unit test - app ``catalogs`` - ``ProductImageVariantManager``
+
+        Test that a file which is not an image gets no variant.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=SimpleUploadedFile('notice.pdf', b'%PDF-1.4'),
+            catalog=self.catalog,
+        )
+        self.assertFalse(product.image_variants.exists())
+        self.assertEqual(product.image_placeholder, '')
+        self.assertTrue(product.image_unreadable)
+
+    def test_generate_on_save_read_once(self):
+        """Unit test - app ``catalogs`` - ``ProductImageVariantManager``
+
+        Test that a new image is read once for its placeholder and variants.
+        """
+        with mock.patch(
+            'teamspirit.catalogs.signals.open_image',
+            wraps=open_image,
+        ) as signal_open, mock.patch(
+            'teamspirit.catalogs.managers.open_image',
+            wraps=open_image,
+        ) as manager_open:
+            product = Product.objects.create(
+                name="Débardeur homme",
+                image=make_image(),
+                catalog=self.catalog,
+            )
+        self.assertEqual(signal_open.call_count, 1)
+        self.assertEqual(manager_open.call_count, 0)
+        self.assertTrue(product.image_placeholder)
+        self.assertEqual(product.image_variants.count(), 6)
+
+    def test_generate_image_variants_command(self):
+        """Unit test - app ``catalogs`` - command ``generate_image_variants``
+
+        Test the backfill of the products missing their variants.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        ProductImageVariant.objects.filter(product=product).delete()
+        Product.objects.filter(pk=product.pk).update(image_placeholder='')
+        updated_at = Catalog.objects.get(pk=self.catalog.pk).updated_at
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+        self.assertEqual(product.image_variants.count(), 6)
+        product.refresh_from_db()
+        self.assertTrue(product.image_placeholder)
+        # the catalog is modified, for its ``Last-Modified`` header
+        self.assertGreater(
+            Catalog.objects.get(pk=self.catalog.pk).updated_at,
+            updated_at
+        )
+        self.assertIn("1 article(s) traité(s), 6 image(s)", out.getvalue())
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+        self.assertIn("0 article(s) traité(s)", out.getvalue())
+
+    def test_generate_image_variants_command_unreadable(self):
+        """Unit test - app ``catalogs`` - command ``generate_image_variants``
+
+        Test that an unreadable file is not processed again at each run.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        ProductImageVariant.objects.filter(product=product).delete()
+        # a file replaced outside of the app
+        Product.objects.filter(pk=product.pk).update(
+            image=product.image.storage.save(
+                'produits/notice.png',
+                ContentFile(b'%PDF-1.4'),
+            ),
+            image_placeholder='',
+        )
+        err = StringIO()
+        call_command('generate_image_variants', stdout=StringIO(), stderr=err)
+        self.assertIn("la photo n'a pas pu être lue", err.getvalue())
+        product.refresh_from_db()
+        self.assertTrue(product.image_unreadable)
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+        self.assertIn("0 article(s) traité(s)", out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProductImageVariantFileTestCase(TransactionTestCase):
+    """Test the files of the resized images, deleted once committed."""
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+
+    def test_generate_on_new_image(self):
+        """Unit test - app ``catalogs`` - ``ProductImageVariantManager``
+
+        Test that a new image replaces the variants and their files.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        old_variant = product.image_variants.first()
+        storage = old_variant.file.storage
+        product.image = make_image(200, 100, 'autre.png')
+        product.save()
+        self.assertFalse(storage.exists(old_variant.file.name))
+        self.assertEqual(
+            set(product.image_variants.values_list('width', flat=True)),
+            {200}
+        )
+        self.assertEqual(
+            (product.image_width, product.image_height),
+            (200, 100)
+        )
+
+    def test_delete_rolled_back(self):
+        """Unit test - app ``catalogs`` - ``ProductImageVariantManager``
+
+        Test that the files are kept if the deletion is rolled back.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        variant = product.image_variants.first()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            product.image_variants.all().delete()
+            raise RuntimeError
+        self.assertTrue(variant.file.storage.exists(variant.file.name))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageBlobManagerTestCase(TransactionTestCase):
+    """Test the manager ``ImageBlobManager``."""
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+
+    def test_store_once(self):
+        """Unit test - app ``catalogs`` - manager ``ImageBlobManager``
+
+        Test that an image uploaded twice is stored once, under its hash.
+        """
+        products = [
+            Product.objects.create(
+                name=f"Débardeur {index}",
+                image=make_image(name=f"photo-{index}.PNG"),
+                catalog=self.catalog,
+            )
+            for index in range(2)
+        ]
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.reference_count, 2)
+        self.assertEqual(blob.file.name, f"produits/{blob.sha256}.png")
+        self.assertEqual(
+            {product.image.name for product in products},
+            {blob.file.name}
+        )
+
+    def test_release(self):
+        """Unit test - app ``catalogs`` - manager ``ImageBlobManager``
+
+        Test that an image is deleted once no product refers to it.
+        """
+        products = [
+            Product.objects.create(
+                name=f"Débardeur {index}",
+                image=make_image(),
+                catalog=self.catalog,
+            )
+            for index in range(2)
+        ]
+        blob = ImageBlob.objects.get()
+        storage = blob.file.storage
+        # a new image releases the previous one
+        products[0].image = make_image(200, 100)
+        products[0].save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.reference_count, 1)
+        # the same image uploaded again keeps its references
+        products[1].image = make_image()
+        products[1].save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.reference_count, 1)
+        products[1].delete()
+        self.assertFalse(ImageBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(storage.exists(blob.file.name))
+        self.assertEqual(ImageBlob.objects.get().reference_count, 1)
+
+    def test_copy(self):
+        """Unit test - app ``catalogs`` - manager ``ImageBlobManager``
+
+        Test that a product copied with the name of a stored image counts
+        a reference, so that deleting the copy keeps the image.
+        """
+        product = Product.objects.create(
+            name="Débardeur homme",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        copy = Product.objects.create(
+            name="Débardeur homme",
+            image=product.image.name,
+            catalog=Catalog.objects.create(name="Autre catalogue"),
+        )
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.reference_count, 2)
+        copy.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.reference_count, 1)
+        self.assertTrue(blob.file.storage.exists(product.image.name))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImportCatalogTestCase(TestCase):
+    """Test the command ``import_catalog``."""
+
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        for name, size in [
+            ('short.png', (400, 300)),
+            ('short-copie.png', (400, 300)),
+            ('sweat.jpg', (300, 300)),
+        ]:
+            with open(os.path.join(self.folder, name), 'wb') as file:
+                file.write(make_image(*size).read())
+        self.csv_file = os.path.join(self.folder, 'catalogue.csv')
+        with open(self.csv_file, 'w', encoding='utf-8') as file:
+            file.write(
+                "Article;Prix;Photo;Tailles\n"
+                "Short;20;short.png;\n"
+                "Short enfant;15;short-copie.png;6 ans, 8 ans,6 ans\n"
+                "Sweat;35;sweat.jpg;\n"
+                "Casquette;10;;TU\n"
+                "Gourde;5;manquante.png;\n"
+            )
+
+    def check_catalog(self):
+        catalog = Catalog.objects.get(name="Kit 2027")
+        products = {
+            product.name: product
+            for product in catalog.product_set.all()
+        }
+        self.assertEqual(len(products), 5)
+        self.assertEqual(products["Short"].price, 20)
+        # the identical images are stored once
+        self.assertEqual(
+            products["Short"].image.name,
+            products["Short enfant"].image.name
+        )
+        self.assertEqual(
+            ImageBlob.objects.get(
+                file=products["Short"].image.name
+            ).reference_count,
+            2
+        )
+        self.assertFalse(products["Casquette"].image)
+        self.assertFalse(products["Gourde"].image)
+        self.assertEqual(
+            (products["Sweat"].image_width, products["Sweat"].image_height),
+            (300, 300)
+        )
+        self.assertTrue(products["Sweat"].image_placeholder)
+        self.assertEqual(
+            set(products["Sweat"].image_variants.values_list(
+                'format',
+                'width'
+            )),
+            {('jpeg', 300), ('webp', 300)}
+        )
+        self.assertEqual(products["Short enfant"].image_variants.count(), 4)
+        # the sizes of the file, or the default ones
+        for name, sizes in [
+            ("Short", ['XS', 'S', 'M', 'L', 'XL']),
+            ("Short enfant", ['6 ans', '8 ans']),
+            ("Casquette", ['TU']),
+        ]:
+            self.assertEqual(products[name].available_sizes(), sizes)
+
+    def test_import_catalog_folder(self):
+        """Unit test - app ``catalogs`` - command ``import_catalog``
+
+        Test the import from a folder, with worker processes.
+        """
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_catalog',
+            self.csv_file,
+            name="Kit 2027",
+            images=self.folder,
+            workers=2,
+            stdout=out,
+            stderr=err,
+        )
+        self.check_catalog()
+        self.assertIn("5 article(s) et 2 photo(s) importés", out.getvalue())
+        self.assertIn("« manquante.png » n'a pas pu être lue", err.getvalue())
+
+    def test_import_catalog_zip(self):
+        """Unit test - app ``catalogs`` - command ``import_catalog``
+
+        Test the import from a zip file, in the same process.
+        """
+        archive = os.path.join(self.folder, 'photos.zip')
+        with ZipFile(archive, 'w') as zip_file:
+            for name in ['short.png', 'short-copie.png', 'sweat.jpg']:
+                zip_file.write(os.path.join(self.folder, name), name)
+        call_command(
+            'import_catalog',
+            self.csv_file,
+            name="Kit 2027",
+            images=archive,
+            workers=0,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        self.check_catalog()
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_catalog',
+                self.csv_file,
+                name="Kit 2027",
+                images=archive,
+                workers=0,
+            )
+
+    def test_import_catalog_failure(self):
+        """Unit test - app ``catalogs`` - command ``import_catalog``
+
+        Test that the files written are deleted if the import fails.
+        """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root), mock.patch(
+            'teamspirit.catalogs.management.commands.import_catalog.'
+            'Command.create_products',
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'import_catalog',
+                    self.csv_file,
+                    name="Kit 2027",
+                    images=self.folder,
+                    workers=0,
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+        self.assertFalse(Catalog.objects.filter(name="Kit 2027").exists())
+        self.assertEqual(
+            [files for _, _, files in os.walk(media_root) if files],
+            []
+        )
+
+
+class ProductVariantManagerTestCase(TestCase):
+    """Test the manager ``ProductVariantManager``."""
+
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(
+            name="Débardeur homme",
+            catalog=Catalog.objects.create(name="Catalogue de vêtements"),
+        )
+        self.variant = ProductVariant.objects.create(
+            product=self.product,
+            size='M',
+            quota=3,
+        )
+
+    def test_reserve(self):
+        """Unit test - app ``catalogs`` - manager ``ProductVariantManager``
+
+        Test that the items of a size are reserved within its quota only.
+        """
+        variants = ProductVariant.objects
+        with self.assertNumQueries(1):
+            self.assertTrue(variants.reserve(self.product.pk, 'M', 2))
+        self.assertFalse(variants.reserve(self.product.pk, 'M', 2))
+        self.assertTrue(variants.reserve(self.product.pk, 'M', 1))
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.reserved, 3)
+        variants.release(self.product.pk, 'M', 2)
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.reserved, 1)
+
+    def test_create_defaults(self):
+        """Unit test - app ``catalogs`` - manager ``ProductVariantManager``
+
+        Test that the default sizes are given in one query.
+        """
+        product = Product.objects.create(
+            name="Sweat",
+            catalog=self.product.catalog,
+        )
+        with self.assertNumQueries(1):
+            ProductVariant.objects.create_defaults([product.pk])
+        self.assertEqual(
+            product.available_sizes(),
+            list(ProductVariant.DEFAULT_SIZES)
+        )
+
+    def test_reserve_unavailable_size(self):
+        """Unit test - app ``catalogs`` - manager ``ProductVariantManager``
+
+        Test that only the available sizes can be reserved.
+        """
+        variants = ProductVariant.objects
+        ProductVariant.objects.create(product=self.product, size='L')
+        self.assertTrue(variants.reserve(self.product.pk, 'L', 100))
+        self.assertFalse(variants.reserve(self.product.pk, 'XS', 1))
+        self.variant.available = False
+        self.variant.save()
+        self.assertFalse(variants.reserve(self.product.pk, 'M', 1))
+
+    def test_reconcile(self):
+        """Unit test - app ``catalogs`` - manager ``ProductVariantManager``
+
+        Test that the drifted sizes are recomputed from the cart lines.
+        """
+        # the current campaign
+        Campaign.objects.create()
+        ShoppingCartLine.objects.create(
+            shopping_cart=ShoppingCart.objects.create(
+                user=User.objects.create_user(
+                    email="toto@mail.com",
+                    password="Password123",
+                    personal=Personal.objects.create(
+                        phone_number="01 02 03 04 05",
+                        address=Address.objects.create(
+                            label_first="1 rue de l'impasse",
+                            label_second="",
+                            postal_code="75000",
+                            city="Paris",
+                            country="France"
+                        )
+                    )
+                ),
+            ),
+            product=self.product,
+            quantity=2,
+            size='M',
+        )
+        self.assertEqual(ProductVariant.objects.reconcile(), 1)
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.reserved, 2)
+        self.assertEqual(ProductVariant.objects.reconcile(), 0)
+
+
+@skipIf(connection.vendor != 'postgresql', "The search index needs PostgreSQL")
+class ProductSearchTestCase(TestCase):
+    """Test the product search of ``ProductManager`` on PostgreSQL."""
+
+    def test_search(self):
+        """Unit test - app ``catalogs`` - manager ``ProductManager``
+
+        Test the French stemming, the typos and the catalog names.
+        """
+        catalog = Catalog.objects.create(name="Accessoires")
+        cap = Product.objects.create(name="Casquette", catalog=catalog)
+        Product.objects.create(
+            name="Short de course",
+            catalog=Catalog.objects.create(name="Vêtements"),
+        )
+        self.assertEqual(list(Product.objects.search("casquettes")), [cap])
+        self.assertEqual(list(Product.objects.search("casquete")), [cap])
+        self.assertEqual(list(Product.objects.search("accessoire")), [cap])
+        # a renamed catalog updates the search vectors of its products
+        catalog.name = "Goodies"
+        catalog.save()
+        self.assertEqual(list(Product.objects.search("goodies")), [cap])
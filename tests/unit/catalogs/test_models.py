@@ -32,6 +32,26 @@ class CatalogModelTestsCase(TestCase):
         self.assertIsInstance(self.catalog.name, str)
         self.assertEqual(self.catalog.name, "Catalogue de vêtements")
 
+    def test_last_modified(self):
+        """Unit test - app ``catalogs`` - model ``Catalog`` - #1.3
+
+        Test the last change of the catalog or of its products.
+        """
+        catalog = Catalog.objects.with_last_modified().get(
+            pk=self.catalog.pk
+        )
+        self.assertEqual(catalog.last_modified, self.catalog.updated_at)
+        product = Product.objects.create(name="Short", catalog=self.catalog)
+        catalog = Catalog.objects.with_last_modified().get(
+            pk=self.catalog.pk
+        )
+        self.assertEqual(catalog.last_modified, product.updated_at)
+        product.delete()
+        catalog = Catalog.objects.with_last_modified().get(
+            pk=self.catalog.pk
+        )
+        self.assertGreater(catalog.last_modified, product.updated_at)
+
 
 class ProductModelTestsCase(TestCase):
     """Test the model ``Product``."""
@@ -7,10 +7,43 @@ from django.urls import reverse
 class CatalogsUrlsTestCase(TestCase):
     """Test the urls in the app ``catalogs``."""
 
-    def test_catalog_url(self):
+    def test_index_url(self):
         """Unit test - app ``catalogs`` - url ``catalog/``
 
-        Test the catalog url.
+        Test the catalog index url.
         """
-        url = reverse('catalogs:catalog')
+        url = reverse('catalogs:index')
         self.assertEqual(url, '/catalog/')
+
+    def test_catalog_url(self):
+        """Unit test - app ``catalogs`` - url ``catalog/<catalog_id>/``
+
+        Test the catalog url.
+        """
+        url = reverse('catalogs:catalog', kwargs={'catalog_id': 1})
+        self.assertEqual(url, '/catalog/1/')
+
+    def test_search_url(self):
+        """Unit test - app ``catalogs`` - url ``catalog/search/``
+
+        Test the product search url.
+        """
+        url = reverse('catalogs:search')
+        self.assertEqual(url, '/catalog/search/')
+
+    def test_catalogs_api_url(self):
+        """Unit test - app ``catalogs`` - url ``catalog/api/catalogs/``
+
+        Test the JSON catalogs url.
+        """
+        url = reverse('catalogs:api_catalogs')
+        self.assertEqual(url, '/catalog/api/catalogs/')
+
+    def test_products_api_url(self):
+        """Unit test - app ``catalogs`` - url
+        ``catalog/api/catalogs/<catalog_id>/products/``
+
+        Test the JSON products url.
+        """
+        url = reverse('catalogs:api_products', kwargs={'catalog_id': 1})
+        self.assertEqual(url, '/catalog/api/catalogs/1/products/')
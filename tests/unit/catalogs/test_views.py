@@ -1,12 +1,24 @@
 """Contain the unit tests related to the views in app ``catalogs``."""
 
+import json
+from unittest import mock
+
+from django.http import Http404
 from django.http.request import HttpRequest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from teamspirit.catalogs.views import catalog_view
+from teamspirit.catalogs.api import catalogs_api_view, products_api_view
+from teamspirit.catalogs.cache import get_catalog_version
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
+from teamspirit.catalogs.views import (
+    catalog_index_view,
+    catalog_view,
+    product_search_view,
+)
 from teamspirit.core.models import Address
 from teamspirit.profiles.models import Personal
 from teamspirit.users.models import User
+from tests.unit.catalogs.test_managers import MEDIA_ROOT, make_image
 
 
 class CatalogsViewsTestCase(TestCase):
@@ -35,9 +47,19 @@ class CatalogsViewsTestCase(TestCase):
         # log this user in
         self.client.login(email="toto@mail.com", password="TopSecret")
         # a 'get' request
-        self.get_request = HttpRequest()
-        self.get_request.method = 'get'
-        self.get_request.user = self.user
+        self.get_request = self.make_get_request()
+        # a catalog
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+
+    def make_get_request(self, **params):
+        """Return a new 'get' request of the user, with the given params."""
+        request = HttpRequest()
+        request.method = 'get'
+        request.user = self.user
+        request.GET.update(params)
+        return request
 
     def test_catalog_view(self):
         """Unit test - app ``catalogs`` - view ``catalog_view``
@@ -45,10 +67,387 @@ class CatalogsViewsTestCase(TestCase):
         Test the catalog view.
         """
         view = catalog_view
-        response = view(self.get_request)  # type is TemplateResponse
+        # type is TemplateResponse
+        response = view(self.get_request, catalog_id=self.catalog.id)
         # render the response content
         response.render()
         html = response.content.decode('utf8')
         self.assertEqual(response.status_code, 200)
         self.assertTrue(html.startswith('<!DOCTYPE html>'))
         self.assertIn('<title>Team Spirit - Catalogue</title>', html)
+
+    def test_catalog_view_pagination(self):
+        """Unit test - app ``catalogs`` - view ``catalog_view``
+
+        Test the links to the next page.
+        """
+        products = [
+            Product.objects.create(
+                name=f"Article {index}",
+                catalog=self.catalog,
+            )
+            for index in range(13)
+        ]
+        view = catalog_view
+        response = view(self.get_request, catalog_id=self.catalog.id)
+        response.render()
+        self.assertEqual(len(response.context_data['object_list']), 12)
+        cursor = f"{self.catalog.pk}-{products[11].pk}"
+        self.assertIn(f'href="?after={cursor}"', response.content.decode())
+        response = view(
+            self.make_get_request(after=cursor),
+            catalog_id=self.catalog.id
+        )
+        self.assertEqual(
+            list(response.context_data['object_list']),
+            products[12:]
+        )
+
+    def test_catalog_view_invalid_page(self):
+        """Unit test - app ``catalogs`` - view ``catalog_view``
+
+        Test that a malformed cursor, or two cursors, are not found.
+        """
+        with self.assertRaises(Http404):
+            catalog_view(
+                self.make_get_request(after='abc'),
+                catalog_id=self.catalog.id
+            )
+        with self.assertRaises(Http404):
+            catalog_view(
+                self.make_get_request(
+                    after=f'{self.catalog.id}-1',
+                    before=f'{self.catalog.id}-2',
+                ),
+                catalog_id=self.catalog.id
+            )
+
+    def test_catalog_view_scope(self):
+        """Unit test - app ``catalogs`` - view ``catalog_view``
+
+        Test that only the available products of the catalog are listed.
+        """
+        product = Product.objects.create(name="Short", catalog=self.catalog)
+        Product.objects.create(
+            name="Sweat",
+            catalog=self.catalog,
+            is_available=False,
+        )
+        Product.objects.create(
+            name="Casquette",
+            catalog=Catalog.objects.create(name="Accessoires"),
+        )
+        response = catalog_view(self.get_request, catalog_id=self.catalog.id)
+        self.assertEqual(
+            list(response.context_data['object_list']),
+            [product]
+        )
+        with self.assertRaises(Http404):
+            catalog_view(self.make_get_request(), catalog_id=0)
+
+    def test_catalog_index_view(self):
+        """Unit test - app ``catalogs`` - view ``catalog_index_view``
+
+        Test the catalogs with their number of available products.
+        """
+        Product.objects.create(name="Short", catalog=self.catalog)
+        Product.objects.create(
+            name="Sweat",
+            catalog=self.catalog,
+            is_available=False,
+        )
+        Catalog.objects.create(name="Accessoires")
+        with self.assertNumQueries(1):
+            response = catalog_index_view(self.get_request)
+            catalogs = list(response.context_data['object_list'])
+        self.assertEqual(
+            [(catalog.name, catalog.product_count) for catalog in catalogs],
+            [("Accessoires", 0), ("Catalogue de vêtements", 1)]
+        )
+        response.render()
+        self.assertIn(
+            '<title>Team Spirit - Catalogues</title>',
+            response.content.decode('utf8')
+        )
+
+    @override_settings(MEDIA_ROOT=MEDIA_ROOT)
+    def test_catalog_view_srcset(self):
+        """Unit test - app ``catalogs`` - view ``catalog_view``
+
+        Test the resized images offered to the browser.
+        """
+        Product.objects.create(
+            name="Short",
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        Product.objects.create(name="Sweat", catalog=self.catalog)
+        # the catalog, its products, their resized images, their sizes
+        with self.assertNumQueries(4):
+            response = catalog_view(
+                self.get_request,
+                catalog_id=self.catalog.id
+            )
+            response.render()
+        html = response.content.decode('utf8')
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn('-320.webp 320w', html)
+        self.assertIn('-640.jpeg 640w', html)
+        # the placeholder is shown until the lazy image is loaded
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('width="800" height="600"', html)
+        self.assertIn('style="background: url(data:image/jpeg;base64,', html)
+
+    def test_catalog_view_sizes(self):
+        """Unit test - app ``catalogs`` - view ``catalog_view``
+
+        Test that the available sizes of the products are shown.
+        """
+        product = Product.objects.create(name="Short", catalog=self.catalog)
+        ProductVariant.objects.create(product=product, size="S")
+        variant = ProductVariant.objects.create(product=product, size="XXL")
+        response = catalog_view(self.get_request, catalog_id=self.catalog.id)
+        response.render()
+        self.assertIn('>XXL</span>', response.content.decode('utf8'))
+        # a changed size is shown at once
+        variant.available = False
+        variant.save()
+        response = catalog_view(
+            self.make_get_request(),
+            catalog_id=self.catalog.id
+        )
+        response.render()
+        html = response.content.decode('utf8')
+        self.assertIn('>S</span>', html)
+        self.assertNotIn('>XXL</span>', html)
+        # a product without any available size cannot be ordered
+        ProductVariant.objects.filter(product=product).update(
+            available=False
+        )
+        product.save()
+        response = catalog_view(
+            self.make_get_request(),
+            catalog_id=self.catalog.id
+        )
+        response.render()
+        html = response.content.decode('utf8')
+        self.assertIn("Indisponible", html)
+        self.assertNotIn("Ajouter au panier", html)
+
+    def test_catalog_view_cached_grid(self):
+        """Unit test - app ``catalogs`` - view ``catalog_view``
+
+        Test that the grid is cached until its catalog changes.
+        """
+        product = Product.objects.create(name="Short", catalog=self.catalog)
+        other_catalog = Catalog.objects.create(name="Accessoires")
+        other_version = get_catalog_version(other_catalog.id)
+        view = catalog_view
+        view(self.get_request, catalog_id=self.catalog.id).render()
+        # only the catalog is read
+        with self.assertNumQueries(1):
+            response = view(
+                self.make_get_request(),
+                catalog_id=self.catalog.id
+            )
+            response.render()
+        self.assertIn("Short", response.content.decode('utf8'))
+        product.name = "Bermuda"
+        product.save()
+        response = view(self.make_get_request(), catalog_id=self.catalog.id)
+        response.render()
+        html = response.content.decode('utf8')
+        self.assertIn("Bermuda", html)
+        self.assertNotIn("Short", html)
+        self.assertEqual(get_catalog_version(other_catalog.id), other_version)
+
+    def test_product_search_view(self):
+        """Unit test - app ``catalogs`` - view ``product_search_view``
+
+        Test the available products matching their name or catalog name.
+        """
+        short = Product.objects.create(name="Short", catalog=self.catalog)
+        Product.objects.create(
+            name="Short long",
+            catalog=self.catalog,
+            is_available=False,
+        )
+        cap = Product.objects.create(
+            name="Casquette",
+            catalog=Catalog.objects.create(name="Accessoires"),
+        )
+        for text, products in [
+            ("short", [short]),
+            ("accessoires", [cap]),
+            ("  ", []),
+            ("chaussette", []),
+        ]:
+            response = product_search_view(self.make_get_request(q=text))
+            self.assertEqual(
+                list(response.context_data['object_list']),
+                products
+            )
+        response.render()
+        html = response.content.decode('utf8')
+        self.assertIn('<title>Team Spirit - Recherche</title>', html)
+        self.assertIn("Aucun article ne correspond à votre recherche", html)
+
+    def test_catalogs_api_view(self):
+        """Unit test - app ``catalogs`` - view ``catalogs_api_view``
+
+        Test the JSON list of the catalogs.
+        """
+        Product.objects.create(name="Short", catalog=self.catalog)
+        response = catalogs_api_view(self.get_request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(json.loads(response.content), {
+            'results': [{
+                'id': self.catalog.id,
+                'name': "Catalogue de vêtements",
+                'product_count': 1,
+                'products': f'/catalog/api/catalogs/{self.catalog.id}/'
+                            'products/',
+            }],
+            'previous': None,
+            'next': None,
+        })
+
+    @override_settings(MEDIA_ROOT=MEDIA_ROOT)
+    def test_products_api_view(self):
+        """Unit test - app ``catalogs`` - view ``products_api_view``
+
+        Test the JSON list of the products, with their resized images.
+        """
+        short = Product.objects.create(
+            name="Short",
+            price=12,
+            image=make_image(),
+            catalog=self.catalog,
+        )
+        Product.objects.create(
+            name="Sweat",
+            is_available=False,
+            catalog=self.catalog,
+        )
+        # the catalog, the products, their resized images
+        with self.assertNumQueries(3):
+            response = products_api_view(
+                self.get_request,
+                catalog_id=self.catalog.id
+            )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(len(data['results']), 1)
+        product = data['results'][0]
+        self.assertEqual(product['id'], short.id)
+        self.assertEqual(product['price'], 12)
+        self.assertEqual(product['image'], short.image.url)
+        self.assertEqual((product['image_width'], product['image_height']),
+                         (800, 600))
+        self.assertEqual(len(product['image_variants']), 6)
+        self.assertIn(
+            {
+                'format': 'webp',
+                'width': 320,
+                'url': short.image_variants.get(
+                    format='webp',
+                    width=320,
+                ).file.url,
+            },
+            product['image_variants']
+        )
+
+    def test_products_api_view_pagination(self):
+        """Unit test - app ``catalogs`` - view ``products_api_view``
+
+        Test that the products are paginated on a cursor.
+        """
+        products = Product.objects.bulk_create([
+            Product(name=f"Article {number}", catalog=self.catalog)
+            for number in range(3)
+        ])
+        products = list(Product.objects.order_by('id'))
+        request = self.make_get_request()
+        request.path = '/catalog/api/catalogs/1/products/'
+        with mock.patch('teamspirit.catalogs.api.API_PAGE_SIZE', 2):
+            data = json.loads(products_api_view(
+                request,
+                catalog_id=self.catalog.id
+            ).content)
+            self.assertEqual(
+                [product['id'] for product in data['results']],
+                [product.id for product in products[:2]]
+            )
+            self.assertIsNone(data['previous'])
+            self.assertEqual(
+                data['next'],
+                f'{request.path}?after={self.catalog.id}-{products[1].id}'
+            )
+            data = json.loads(products_api_view(
+                self.make_get_request(
+                    after=f'{self.catalog.id}-{products[1].id}'
+                ),
+                catalog_id=self.catalog.id
+            ).content)
+        self.assertEqual(
+            [product['id'] for product in data['results']],
+            [products[2].id]
+        )
+        self.assertIsNotNone(data['previous'])
+        self.assertIsNone(data['next'])
+
+    def test_products_api_view_errors(self):
+        """Unit test - app ``catalogs`` - view ``products_api_view``
+
+        Test the invalid cursors and the unknown catalogs.
+        """
+        response = products_api_view(
+            self.make_get_request(after='abc'),
+            catalog_id=self.catalog.id
+        )
+        self.assertEqual(response.status_code, 400)
+        response = products_api_view(
+            self.make_get_request(after='1-1', before='1-2'),
+            catalog_id=self.catalog.id
+        )
+        self.assertEqual(response.status_code, 400)
+        response = products_api_view(
+            self.make_get_request(),
+            catalog_id=self.catalog.id + 1
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_products_api_view_size(self):
+        """Unit test - app ``catalogs`` - view ``products_api_view``
+
+        Test the products filtered on an available size, on every page.
+        """
+        products = Product.objects.bulk_create([
+            Product(name=f"Article {number}", catalog=self.catalog)
+            for number in range(4)
+        ])
+        products = list(Product.objects.order_by('id'))
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=products[0], size='M'),
+            ProductVariant(product=products[1], size='M', available=False),
+            ProductVariant(product=products[2], size='M'),
+            ProductVariant(product=products[3], size='M'),
+            ProductVariant(product=products[3], size='L'),
+        ])
+        request = self.make_get_request(size='M')
+        request.path = '/catalog/api/catalogs/1/products/'
+        with mock.patch('teamspirit.catalogs.api.API_PAGE_SIZE', 2):
+            data = json.loads(products_api_view(
+                request,
+                catalog_id=self.catalog.id
+            ).content)
+        self.assertEqual(
+            [product['id'] for product in data['results']],
+            [products[0].id, products[2].id]
+        )
+        self.assertEqual(
+            data['next'],
+            f'{request.path}?size=M&after={self.catalog.id}-{products[2].id}'
+        )
@@ -3,10 +3,19 @@
 from django.core.files.uploadedfile import UploadedFile
 from django.test import TestCase
 
-from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
 from teamspirit.core.models import Address
-from teamspirit.preorders.forms import AddToCartForm, DropFromCartForm
-from teamspirit.preorders.models import ShoppingCart, ShoppingCartLine
+from teamspirit.preorders.forms import (
+    AddToCartForm,
+    DropFromCartForm,
+    ShoppingCartLineFormSet,
+)
+from teamspirit.preorders.models import (
+    Campaign,
+    ProductQuota,
+    ShoppingCart,
+    ShoppingCartLine,
+)
 from teamspirit.profiles.models import Personal
 from teamspirit.users.models import User
 
@@ -38,6 +47,8 @@ class PreordersFormsTestCase(TestCase):
         # log this user in
         self.client.login(email="toto@mail.com", password="Password123")
         # some other data
+        # the current campaign
+        Campaign.objects.create()
         self.shopping_cart = ShoppingCart.objects.create(
             user=self.user,
         )
@@ -53,6 +64,11 @@ class PreordersFormsTestCase(TestCase):
             price=25,
             catalog=self.catalog,
         )
+        # the sizes of the product
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=self.product, size=size)
+            for size in ['XS', 'S', 'M', 'L', 'XL']
+        ])
         self.shopping_cart_line = ShoppingCartLine.objects.create(
             shopping_cart=self.shopping_cart,
             product=self.product,
@@ -69,12 +85,14 @@ class PreordersFormsTestCase(TestCase):
         records_before = ShoppingCartLine.objects.all().count()
         # process the form
         form_data = {
-            'shopping_cart': self.shopping_cart,
             'product': self.product,
             'quantity': 1,
             'size': 'M',
         }
-        form = AddToCartForm(data=form_data)
+        form = AddToCartForm(
+            data=form_data,
+            shopping_cart=self.shopping_cart,
+        )
         self.assertTrue(form.is_valid())
         form.save()
         expected_shopping_cart_line = ShoppingCartLine(
@@ -106,6 +124,90 @@ class PreordersFormsTestCase(TestCase):
             expected_shopping_cart_line.size
         )
 
+    def test_add_to_cart_form_merges_lines(self):
+        """Unit test - app ``preorders`` - form ``AddToCartForm``
+
+        Test that adding the same product and size increases the quantity.
+        """
+        records_before = ShoppingCartLine.objects.all().count()
+        form_data = {
+            'product': self.product,
+            'quantity': 3,
+            'size': 'XS',
+        }
+        form = AddToCartForm(
+            data=form_data,
+            shopping_cart=self.shopping_cart,
+        )
+        self.assertTrue(form.is_valid())
+        records_after = ShoppingCartLine.objects.all().count()
+        self.assertEqual(records_after, records_before)
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.quantity, 2 + 3)
+        self.shopping_cart.refresh_from_db()
+        self.assertEqual(self.shopping_cart.total_amount, 25 * 5)
+
+    def test_add_to_cart_form_failure_max_quantity(self):
+        """Unit test - app ``preorders`` - form ``AddToCartForm``
+
+        Test that the merged quantity cannot exceed the maximal quantity.
+        """
+        form_data = {
+            'product': self.product,
+            'quantity': 4,
+            'size': 'XS',
+        }
+        form = AddToCartForm(
+            data=form_data,
+            shopping_cart=self.shopping_cart,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('quantity', form.errors)
+        self.shopping_cart_line.refresh_from_db()
+        self.assertEqual(self.shopping_cart_line.quantity, 2)
+
+    def test_add_to_cart_form_failure_sold_out(self):
+        """Unit test - app ``preorders`` - form ``AddToCartForm``
+
+        Test that no more items than the quota can be added.
+        """
+        ProductQuota.objects.create(product=self.product, quota=3)
+        form_data = {
+            'product': self.product,
+            'quantity': 4,
+            'size': 'M',
+        }
+        form = AddToCartForm(
+            data=form_data,
+            shopping_cart=self.shopping_cart,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertTrue(form.non_field_errors())
+        self.assertFalse(
+            ShoppingCartLine.objects.filter(size='M').exists()
+        )
+
+    def test_add_to_cart_form_failure_closed_cart(self):
+        """Unit test - app ``preorders`` - form ``AddToCartForm``
+
+        Test that no product can be added to a closed cart.
+        """
+        self.shopping_cart.is_open = False
+        self.shopping_cart.save()
+        records_before = ShoppingCartLine.objects.all().count()
+        form_data = {
+            'product': self.product,
+            'quantity': 1,
+            'size': 'M',
+        }
+        form = AddToCartForm(
+            data=form_data,
+            shopping_cart=self.shopping_cart,
+        )
+        self.assertFalse(form.is_valid())
+        records_after = ShoppingCartLine.objects.all().count()
+        self.assertEqual(records_after, records_before)
+
     def test_drop_from_cart_form_success(self):
         """Unit test - app ``preorders`` - form ``DropFromCartForm``
 
@@ -116,8 +218,6 @@ class PreordersFormsTestCase(TestCase):
         # process the form
         form = DropFromCartForm(
             data={},
-            request_user=self.user,
-            line_id=self.shopping_cart_line.id,
             shopping_cart_line=self.shopping_cart_line
         )
         self.assertTrue(form.is_valid())
@@ -125,3 +225,55 @@ class PreordersFormsTestCase(TestCase):
         records_after = ShoppingCartLine.objects.all().count()
         # is one record added in database?
         self.assertEqual(records_after, records_before - 1)
+
+    def test_drop_from_cart_form_failure_closed_campaign(self):
+        """Unit test - app ``preorders`` - form ``DropFromCartForm``
+
+        Test that no line can be dropped once the campaign is over.
+        """
+        campaign = self.shopping_cart.campaign
+        campaign.closes_at = campaign.opens_at
+        campaign.save()
+        form = DropFromCartForm(
+            data={},
+            shopping_cart_line=self.shopping_cart_line
+        )
+        self.assertFalse(form.is_valid())
+        self.assertTrue(
+            ShoppingCartLine.objects.filter(
+                pk=self.shopping_cart_line.pk
+            ).exists()
+        )
+
+    def test_shopping_cart_line_formset_concurrent_change(self):
+        """Unit test - app ``preorders`` - formset ``ShoppingCartLineFormSet``
+
+        Test that the reserved items follow the stored lines, even if they
+        changed since the form was displayed.
+        """
+        quota = ProductQuota.objects.create(
+            product=self.product,
+            quota=10,
+            reserved=2,
+        )
+        formset = ShoppingCartLineFormSet(
+            data={
+                'form-TOTAL_FORMS': 1,
+                'form-INITIAL_FORMS': 1,
+                'form-0-id': self.shopping_cart_line.id,
+                'form-0-quantity': 3,
+                'form-0-size': 'XS',
+            },
+            queryset=ShoppingCartLine.objects.filter(
+                pk=self.shopping_cart_line.pk
+            ),
+        )
+        self.assertTrue(formset.is_valid())
+        # meanwhile, another request drops an item
+        ShoppingCartLine.objects.filter(
+            pk=self.shopping_cart_line.pk
+        ).update(quantity=1)
+        ProductQuota.objects.release(self.product.pk, 1)
+        self.assertTrue(formset.save())
+        quota.refresh_from_db()
+        self.assertEqual(quota.reserved, 3)
@@ -3,4 +3,603 @@ This module contains the unit tests related to
 the managers in app ``preorders``.
 """
 
-# from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
+from teamspirit.core.models import Address
+from teamspirit.preorders.models import (
+    Campaign,
+    OrderLine,
+    ProductQuota,
+    ShoppingCart,
+    ShoppingCartLine,
+)
+from teamspirit.profiles.models import Personal
+from teamspirit.users.models import User
+
+
+class CampaignManagerTestCase(TestCase):
+    """Test the manager ``CampaignManager``."""
+
+    def setUp(self):
+        super().setUp()
+        self.toto = User.objects.create_user(
+            email="toto@mail.com",
+            password="Password123",
+        )
+        self.old_campaign = Campaign.objects.create(
+            name="Tenues 2019",
+            opens_at=timezone.now() - timedelta(days=365),
+        )
+
+    def test_get_current(self):
+        """Unit test - app ``preorders`` - manager ``CampaignManager``
+
+        Test the current campaign, ignoring the future ones.
+        """
+        Campaign.objects.create(
+            name="Tenues 2022",
+            opens_at=timezone.now() + timedelta(days=30),
+        )
+        self.assertEqual(Campaign.objects.get_current(), self.old_campaign)
+        campaign = Campaign.objects.create(name="Tenues 2020")
+        self.assertEqual(Campaign.objects.get_current(), campaign)
+
+    def test_get_current_for(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartManager``
+
+        Test that each campaign has its own cart per user.
+        """
+        old_cart = ShoppingCart.objects.get_current_for(self.toto)
+        self.assertEqual(old_cart.campaign, self.old_campaign)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                ShoppingCart.objects.get_current_for(self.toto),
+                old_cart
+            )
+        campaign = Campaign.objects.create(name="Tenues 2020")
+        cart = ShoppingCart.objects.get_current_for(self.toto)
+        self.assertNotEqual(cart, old_cart)
+        self.assertEqual(cart.campaign, campaign)
+
+    def test_get_current_none(self):
+        """Unit test - app ``preorders`` - manager ``CampaignManager``
+
+        Test that no campaign nor cart is created when none is current.
+        """
+        Campaign.objects.archive(Campaign.objects.all())
+        Campaign.objects.create(
+            name="Tenues 2022",
+            opens_at=timezone.now() + timedelta(days=30),
+        )
+        self.assertIsNone(Campaign.objects.get_current())
+        self.assertIsNone(ShoppingCart.objects.get_current_for(self.toto))
+        self.assertEqual(Campaign.objects.count(), 2)
+        self.assertFalse(ShoppingCart.objects.exists())
+
+    def test_archive(self):
+        """Unit test - app ``preorders`` - manager ``CampaignManager``
+
+        Test that the archived campaigns have their carts closed.
+        """
+        old_cart = ShoppingCart.objects.get_current_for(self.toto)
+        campaign = Campaign.objects.create(name="Tenues 2020")
+        cart = ShoppingCart.objects.get_current_for(self.toto)
+        Campaign.objects.archive(
+            Campaign.objects.filter(pk=self.old_campaign.pk)
+        )
+        old_cart.refresh_from_db()
+        cart.refresh_from_db()
+        self.assertFalse(old_cart.is_open)
+        self.assertTrue(cart.is_open)
+        self.assertEqual(Campaign.objects.get_current(), campaign)
+
+
+class ShoppingCartManagerTestCase(TestCase):
+    """Test the manager ``ShoppingCartManager``."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.address = Address.objects.create(
+            label_first="1 rue de l'impasse",
+            label_second="",
+            postal_code="75000",
+            city="Paris",
+            country="France"
+        )
+        cls.personal = Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=cls.address
+        )
+        cls.toto = User.objects.create_user(
+            email="toto@mail.com",
+            password="Password123",
+            first_name="Toto",
+            last_name="LE RIGOLO",
+            personal=cls.personal
+        )
+        cls.titi = User.objects.create_user(
+            email="titi@mail.com",
+            password="Password123",
+            first_name="Titi",
+            last_name="LE GRINCHEUX",
+            personal=cls.personal
+        )
+        # the current campaign
+        Campaign.objects.create()
+        cls.shopping_cart = ShoppingCart.objects.create(
+            user=cls.toto,
+        )
+        cls.empty_shopping_cart = ShoppingCart.objects.create(
+            user=cls.titi,
+        )
+        cls.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+        cls.image = UploadedFile()
+        cls.product_a = Product.objects.create(
+            name="Débardeur homme",
+            image=cls.image,
+            is_available=True,
+            is_free=False,
+            price=25,
+            catalog=cls.catalog,
+        )
+        cls.product_b = Product.objects.create(
+            name="T-shirt femme",
+            image=cls.image,
+            is_available=True,
+            is_free=False,
+            price=30,
+            catalog=cls.catalog,
+        )
+        ShoppingCartLine.objects.create(
+            shopping_cart=cls.shopping_cart,
+            product=cls.product_a,
+            quantity=1,
+            size='M',
+        )
+        ShoppingCartLine.objects.create(
+            shopping_cart=cls.shopping_cart,
+            product=cls.product_b,
+            quantity=2,
+            size='S',
+        )
+
+    def test_with_totals(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartManager``
+
+        Test the annotations of ``with_totals()``, in a single query.
+        """
+        with self.assertNumQueries(1):
+            carts = {
+                cart.user_id: cart
+                for cart in ShoppingCart.objects.with_totals()
+            }
+            self.assertEqual(carts[self.toto.id].amount, 25 + 30 * 2)
+            self.assertEqual(carts[self.toto.id].line_count, 2)
+            self.assertEqual(carts[self.toto.id].get_cart_amount(), 85)
+            self.assertEqual(carts[self.titi.id].amount, 0)
+            self.assertEqual(carts[self.titi.id].line_count, 0)
+
+    def test_reconcile_totals(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartManager``
+
+        Test that ``reconcile_totals()`` fixes the drifted carts only.
+        """
+        ShoppingCart.objects.filter(pk=self.shopping_cart.pk).update(
+            total_amount=0,
+            item_count=0,
+        )
+        drifted = ShoppingCart.objects.reconcile_totals()
+        self.assertEqual(len(drifted), 1)
+        cart, stored, computed = drifted[0]
+        self.assertEqual(cart.pk, self.shopping_cart.pk)
+        self.assertEqual(stored, (0, 0))
+        self.assertEqual(computed, (85, 2))
+        self.shopping_cart.refresh_from_db()
+        self.assertEqual(self.shopping_cart.total_amount, 85)
+        self.assertEqual(self.shopping_cart.item_count, 2)
+        self.assertEqual(ShoppingCart.objects.reconcile_totals(), [])
+
+    def test_price_edit_closed_cart(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartManager``
+
+        Test that a price edit after closing keeps the totals of the order.
+        """
+        ShoppingCart.objects.close_campaign()
+        self.product_a.price = 99
+        self.product_a.save()
+        self.shopping_cart.refresh_from_db()
+        self.assertEqual(self.shopping_cart.total_amount, 85)
+        self.assertEqual(ShoppingCart.objects.reconcile_totals(), [])
+        self.shopping_cart.refresh_from_db()
+        self.assertEqual(self.shopping_cart.total_amount, 85)
+
+    def test_reconcile_cart_totals_command(self):
+        """Unit test - app ``preorders`` - command ``reconcile_cart_totals``
+
+        Test the command output.
+        """
+        ShoppingCart.objects.filter(pk=self.shopping_cart.pk).update(
+            total_amount=10,
+        )
+        out = StringIO()
+        call_command('reconcile_cart_totals', stdout=out)
+        self.assertIn(f"Panier {self.shopping_cart.pk} :", out.getvalue())
+        self.assertIn("1 panier(s) corrigé(s).", out.getvalue())
+
+    def test_close_campaign(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartManager``
+
+        Test that the open carts are closed and their lines snapshot.
+        """
+        self.assertEqual(
+            ShoppingCart.objects.close_campaign(batch_size=1),
+            (2, 2)
+        )
+        self.assertFalse(ShoppingCart.objects.filter(is_open=True).exists())
+        self.assertEqual(
+            list(OrderLine.objects.order_by('product_name').values_list(
+                'shopping_cart',
+                'product_name',
+                'size',
+                'quantity',
+                'unit_price',
+                'amount',
+            )),
+            [
+                (self.shopping_cart.pk, "Débardeur homme", 'M', 1, 25, 25),
+                (self.shopping_cart.pk, "T-shirt femme", 'S', 2, 30, 60),
+            ]
+        )
+        # a later price change does not rewrite the orders
+        self.product_a.price = 40
+        self.product_a.save()
+        order_line = OrderLine.objects.get(product=self.product_a)
+        self.assertEqual(order_line.amount, 25)
+        # the campaign is already closed
+        self.assertEqual(ShoppingCart.objects.close_campaign(), (0, 0))
+
+    def test_close_campaign_command(self):
+        """Unit test - app ``preorders`` - command ``close_campaign``
+
+        Test the command output.
+        """
+        out = StringIO()
+        call_command('close_campaign', stdout=out)
+        self.assertIn(
+            "2 panier(s) clos, 2 ligne(s) de commande enregistrée(s).",
+            out.getvalue()
+        )
+
+
+class ShoppingCartLineManagerTestCase(TestCase):
+    """Test the manager ``ShoppingCartLineManager``."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.address = Address.objects.create(
+            label_first="1 rue de l'impasse",
+            label_second="",
+            postal_code="75000",
+            city="Paris",
+            country="France"
+        )
+        cls.personal = Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=cls.address
+        )
+        cls.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+        cls.product_a = Product.objects.create(
+            name="Débardeur homme",
+            price=25,
+            catalog=cls.catalog,
+        )
+        cls.product_b = Product.objects.create(
+            name="T-shirt femme",
+            price=30,
+            catalog=cls.catalog,
+        )
+        cls.old_campaign = Campaign.objects.create(
+            name="Tenues 2019",
+            opens_at=timezone.now() - timedelta(days=365),
+        )
+        # the current campaign
+        cls.campaign = Campaign.objects.create()
+        for email, campaign in [
+            ("toto@mail.com", cls.campaign),
+            ("titi@mail.com", cls.campaign),
+            ("tata@mail.com", cls.old_campaign),
+        ]:
+            shopping_cart = ShoppingCart.objects.create(
+                user=User.objects.create_user(
+                    email=email,
+                    password="Password123",
+                    personal=cls.personal
+                ),
+                campaign=campaign,
+            )
+            ShoppingCartLine.objects.create(
+                shopping_cart=shopping_cart,
+                product=cls.product_a,
+                quantity=1,
+                size='M',
+            )
+            ShoppingCartLine.objects.create(
+                shopping_cart=shopping_cart,
+                product=cls.product_b,
+                quantity=2,
+                size='S',
+            )
+
+    def test_supplier_order(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartLineManager``
+
+        Test the quantities per product and size, in a campaign only.
+        """
+        with self.assertNumQueries(1):
+            rows = list(ShoppingCartLine.objects.supplier_order(self.campaign))
+        self.assertEqual(
+            rows,
+            [
+                ("Débardeur homme", 'M', 2, 50),
+                ("T-shirt femme", 'S', 4, 120),
+            ]
+        )
+        # the order is still there once the campaign is closed
+        ShoppingCart.objects.close_campaign(self.campaign)
+        self.assertEqual(
+            list(ShoppingCartLine.objects.supplier_order(self.campaign)),
+            rows
+        )
+        # and not changed by later price edits
+        self.product_a.price = 99
+        self.product_a.save()
+        self.assertEqual(
+            ShoppingCartLine.objects.supplier_order(self.campaign),
+            rows
+        )
+
+    def test_export_supplier_order_command(self):
+        """Unit test - app ``preorders`` - command ``export_supplier_order``
+
+        Test the command output.
+        """
+        out = StringIO()
+        call_command('export_supplier_order', stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "Article;Taille;Quantité;Montant",
+                "Débardeur homme;M;2;50",
+                "T-shirt femme;S;4;120",
+            ]
+        )
+
+
+class ProductQuotaManagerTestCase(TestCase):
+    """Test the manager ``ProductQuotaManager``."""
+
+    def setUp(self):
+        super().setUp()
+        self.address = Address.objects.create(
+            label_first="1 rue de l'impasse",
+            label_second="",
+            postal_code="75000",
+            city="Paris",
+            country="France"
+        )
+        self.personal = Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=self.address
+        )
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+        self.product = Product.objects.create(
+            name="Débardeur homme",
+            price=25,
+            catalog=self.catalog,
+        )
+        # the sizes of the product
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=self.product, size=size)
+            for size in ['XS', 'S', 'M', 'L', 'XL']
+        ])
+        self.quota = ProductQuota.objects.create(
+            product=self.product,
+            quota=3,
+        )
+        # the current campaign
+        Campaign.objects.create()
+        self.shopping_cart = ShoppingCart.objects.create(
+            user=User.objects.create_user(
+                email="toto@mail.com",
+                password="Password123",
+                personal=self.personal
+            ),
+        )
+
+    def test_reserve(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that the items are reserved within the quota only.
+        """
+        with self.assertNumQueries(1):
+            self.assertTrue(ProductQuota.objects.reserve(self.product.pk, 2))
+        self.assertFalse(ProductQuota.objects.reserve(self.product.pk, 2))
+        self.assertTrue(ProductQuota.objects.reserve(self.product.pk, 1))
+        self.quota.refresh_from_db()
+        self.assertEqual(self.quota.reserved, 3)
+
+    def test_reserve_without_quota(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that a product without quota is unlimited.
+        """
+        self.quota.delete()
+        self.assertTrue(ProductQuota.objects.reserve(self.product.pk, 100))
+
+    def test_add_to_cart_sold_out(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that neither a line nor a reservation is left when sold out.
+        """
+        ShoppingCartLine.objects.add_to_cart(
+            self.shopping_cart, self.product, 'M', 2
+        )
+        with self.assertRaises(ValidationError):
+            ShoppingCartLine.objects.add_to_cart(
+                self.shopping_cart, self.product, 'L', 2
+            )
+        self.assertEqual(ShoppingCartLine.objects.count(), 1)
+        self.quota.refresh_from_db()
+        self.assertEqual(self.quota.reserved, 2)
+
+    def test_add_to_cart_max_quantity_releases(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that the reservation is cancelled beyond the maximal quantity.
+        """
+        self.quota.quota = 10
+        self.quota.save()
+        ShoppingCartLine.objects.add_to_cart(
+            self.shopping_cart, self.product, 'M', 4
+        )
+        with self.assertRaises(ValidationError):
+            ShoppingCartLine.objects.add_to_cart(
+                self.shopping_cart, self.product, 'M', 2
+            )
+        self.quota.refresh_from_db()
+        self.assertEqual(self.quota.reserved, 4)
+
+    def test_release_on_delete(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that a dropped line gives its items back.
+        """
+        line = ShoppingCartLine.objects.add_to_cart(
+            self.shopping_cart, self.product, 'M', 3
+        )
+        line.delete()
+        self.quota.refresh_from_db()
+        self.assertEqual(self.quota.reserved, 0)
+
+    def test_reconcile(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that the drifted counters are recomputed from the lines.
+        """
+        ShoppingCartLine.objects.create(
+            shopping_cart=self.shopping_cart,
+            product=self.product,
+            quantity=2,
+            size='M',
+        )
+        self.assertEqual(ProductQuota.objects.reconcile(), 1)
+        self.quota.refresh_from_db()
+        self.assertEqual(self.quota.reserved, 2)
+        self.assertEqual(ProductQuota.objects.reconcile(), 0)
+
+    def test_add_to_cart_unavailable_size(self):
+        """Unit test - app ``preorders`` - manager ``ShoppingCartLineManager``
+
+        Test that a size beyond its quota or unknown cannot be added.
+        """
+        self.product.variants.filter(size='M').update(quota=2)
+        ShoppingCartLine.objects.add_to_cart(
+            self.shopping_cart, self.product, 'M', 2
+        )
+        for size in ['M', 'XXL']:
+            with self.assertRaises(ValidationError) as context:
+                ShoppingCartLine.objects.add_to_cart(
+                    self.shopping_cart, self.product, size, 1
+                )
+            self.assertIn('size', context.exception.message_dict)
+        # neither the quota of the product is kept
+        self.quota.refresh_from_db()
+        self.assertEqual(self.quota.reserved, 2)
+        ShoppingCartLine.objects.get().delete()
+        self.assertEqual(self.product.variants.get(size='M').reserved, 0)
+
+
+@skipIf(connection.vendor == 'sqlite', "SQLite serializes the writers")
+class ProductQuotaLoadTestCase(TransactionTestCase):
+    """Test the manager ``ProductQuotaManager`` under concurrent requests."""
+
+    def test_no_oversell(self):
+        """Unit test - app ``preorders`` - manager ``ProductQuotaManager``
+
+        Test that concurrent additions never exceed the quota.
+        """
+        address = Address.objects.create(
+            label_first="1 rue de l'impasse",
+            label_second="",
+            postal_code="75000",
+            city="Paris",
+            country="France"
+        )
+        personal = Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=address
+        )
+        catalog = Catalog.objects.create(name="Catalogue de vêtements")
+        product = Product.objects.create(
+            name="Débardeur homme",
+            price=25,
+            catalog=catalog,
+        )
+        # the sizes of the product
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, size=size)
+            for size in ['XS', 'S', 'M', 'L', 'XL']
+        ])
+        quota = ProductQuota.objects.create(product=product, quota=10)
+        # the current campaign
+        Campaign.objects.create()
+        shopping_carts = [
+            ShoppingCart.objects.create(
+                user=User.objects.create_user(
+                    email=f"user{index}@mail.com",
+                    password="Password123",
+                    personal=personal
+                ),
+            )
+            for index in range(40)
+        ]
+
+        def add_to_cart(shopping_cart):
+            try:
+                ShoppingCartLine.objects.add_to_cart(
+                    shopping_cart, product, 'M', 1
+                )
+                return True
+            except ValidationError:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            added = list(executor.map(add_to_cart, shopping_carts))
+        quota.refresh_from_db()
+        self.assertEqual(added.count(True), 10)
+        self.assertEqual(quota.reserved, 10)
+        self.assertEqual(
+            ShoppingCartLine.objects.filter(product=product).count(),
+            10
+        )
@@ -1,11 +1,18 @@
 """Contain the unit tests related to the models in app ``preorders``."""
 
+from datetime import timedelta
+
 from django.core.files.uploadedfile import UploadedFile
 from django.test import TestCase
+from django.utils import timezone
 
 from teamspirit.catalogs.models import Catalog, Product
 from teamspirit.core.models import Address
-from teamspirit.preorders.models import ShoppingCart, ShoppingCartLine
+from teamspirit.preorders.models import (
+    Campaign,
+    ShoppingCart,
+    ShoppingCartLine,
+)
 from teamspirit.profiles.models import Personal
 from teamspirit.users.models import User
 
@@ -34,6 +41,8 @@ class ShoppingCartModelTestsCase(TestCase):
             last_name="LE RIGOLO",
             personal=cls.personal
         )
+        # the current campaign
+        Campaign.objects.create()
         cls.shopping_cart = ShoppingCart.objects.create(
             user=cls.toto,
         )
@@ -125,6 +134,8 @@ class ShoppingCartLineModelTestsCase(TestCase):
             last_name="LE RIGOLO",
             personal=cls.personal
         )
+        # the current campaign
+        Campaign.objects.create()
         cls.shopping_cart = ShoppingCart.objects.create(
             user=cls.toto,
         )
@@ -198,3 +209,136 @@ class ShoppingCartLineModelTestsCase(TestCase):
         Test wether the line amount is correct.
         """
         self.assertEqual(self.shopping_cart_line.get_line_amount(), 25 * 3)
+
+
+class ShoppingCartTotalsTestsCase(TestCase):
+    """Test the denormalized totals of the model ``ShoppingCart``."""
+
+    def setUp(self):
+        super().setUp()
+        self.address = Address.objects.create(
+            label_first="1 rue de l'impasse",
+            label_second="",
+            postal_code="75000",
+            city="Paris",
+            country="France"
+        )
+        self.personal = Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=self.address
+        )
+        self.toto = User.objects.create_user(
+            email="toto@mail.com",
+            password="Password123",
+            first_name="Toto",
+            last_name="LE RIGOLO",
+            personal=self.personal
+        )
+        # the current campaign
+        Campaign.objects.create()
+        self.shopping_cart = ShoppingCart.objects.create(
+            user=self.toto,
+        )
+        self.catalog = Catalog.objects.create(
+            name="Catalogue de vêtements",
+        )
+        self.product = Product.objects.create(
+            name="Débardeur homme",
+            price=25,
+            catalog=self.catalog,
+        )
+        self.shopping_cart_line = ShoppingCartLine.objects.create(
+            shopping_cart=self.shopping_cart,
+            product=self.product,
+            quantity=2,
+            size='M',
+        )
+
+    def assertTotals(self, total_amount, item_count):
+        shopping_cart = ShoppingCart.objects.get(pk=self.shopping_cart.pk)
+        self.assertEqual(shopping_cart.total_amount, total_amount)
+        self.assertEqual(shopping_cart.item_count, item_count)
+
+    def test_totals_on_line_creation(self):
+        """Unit test - app ``preorders`` - model ``ShoppingCart`` - #3.1
+
+        Test the totals when a line is created.
+        """
+        self.assertTotals(50, 1)
+        self.assertEqual(self.shopping_cart.get_cart_amount(), 50)
+
+    def test_totals_on_line_update(self):
+        """Unit test - app ``preorders`` - model ``ShoppingCart`` - #3.2
+
+        Test the totals when a line is updated.
+        """
+        self.shopping_cart_line.quantity = 4
+        self.shopping_cart_line.save()
+        self.assertTotals(100, 1)
+
+    def test_totals_on_line_deletion(self):
+        """Unit test - app ``preorders`` - model ``ShoppingCart`` - #3.3
+
+        Test the totals when a line is deleted.
+        """
+        self.shopping_cart_line.delete()
+        self.assertTotals(0, 0)
+
+    def test_totals_on_price_change(self):
+        """Unit test - app ``preorders`` - model ``ShoppingCart`` - #3.4
+
+        Test the totals when the price of a product changes.
+        """
+        self.product.price = 30
+        self.product.save()
+        self.assertTotals(60, 1)
+
+
+class CampaignModelTestsCase(TestCase):
+    """Test the model ``Campaign``."""
+
+    def test_is_running(self):
+        """Unit test - app ``preorders`` - model ``Campaign`` - #4.1
+
+        Test wether the campaign accepts preorders, given its dates.
+        """
+        now = timezone.now()
+        self.assertTrue(Campaign(opens_at=now).is_running())
+        self.assertTrue(
+            Campaign(
+                opens_at=now,
+                closes_at=now + timedelta(days=1)
+            ).is_running()
+        )
+        self.assertFalse(
+            Campaign(opens_at=now + timedelta(days=1)).is_running()
+        )
+        self.assertFalse(
+            Campaign(
+                opens_at=now - timedelta(days=2),
+                closes_at=now - timedelta(days=1)
+            ).is_running()
+        )
+        self.assertFalse(Campaign(opens_at=now, is_archived=True).is_running())
+
+    def test_lines_campaign(self):
+        """Unit test - app ``preorders`` - model ``Campaign`` - #4.2
+
+        Test that the carts and their lines belong to the current campaign.
+        """
+        campaign = Campaign.objects.create(name="Maillots 2021")
+        user = User.objects.create_user(
+            email="toto@mail.com",
+            password="Password123",
+        )
+        shopping_cart = ShoppingCart.objects.create(user=user)
+        shopping_cart_line = ShoppingCartLine.objects.create(
+            shopping_cart=shopping_cart,
+            product=Product.objects.create(
+                name="Maillot",
+                catalog=Catalog.objects.create(),
+            ),
+            size='M',
+        )
+        self.assertEqual(shopping_cart.campaign, campaign)
+        self.assertEqual(shopping_cart_line.campaign, campaign)
@@ -18,6 +18,14 @@ class PreordersUrlsTestCase(TestCase):
         url = reverse('preorders:shopping_cart')
         self.assertEqual(url, '/shopping_cart/')
 
+    def test_edit_cart_url(self):
+        """Unit test - app ``preorders`` - url ``shopping_cart/edit/``
+
+        Test the 'edit cart' url.
+        """
+        url = reverse('preorders:edit_cart')
+        self.assertEqual(url, '/shopping_cart/edit/')
+
     def test_add_to_cart_url(self):
         """Unit test - app ``preorders`` - url ``shopping_cart/...``
 
@@ -34,3 +42,20 @@ class PreordersUrlsTestCase(TestCase):
         """
         url = reverse('preorders:drop_from_cart', kwargs={'line_id': 1})
         self.assertEqual(url, '/shopping_cart/drop_product/1/')
+
+    def test_supplier_order_url(self):
+        """Unit test - app ``preorders`` - url ``shopping_cart/...``
+
+        [complete url: ``shopping_cart/supplier_order/``]
+        Test the supplier order url.
+        """
+        url = reverse('preorders:supplier_order')
+        self.assertEqual(url, '/shopping_cart/supplier_order/')
+
+    def test_preorders_export_url(self):
+        """Unit test - app ``preorders`` - url ``shopping_cart/export/``
+
+        Test the preorders export url.
+        """
+        url = reverse('preorders:preorders_export')
+        self.assertEqual(url, '/shopping_cart/export/')
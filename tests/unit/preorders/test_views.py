@@ -4,12 +4,26 @@ the views in app ``preorders``.
 """
 
 from django.core.files.uploadedfile import UploadedFile
+from django.http import Http404
 from django.http.request import HttpRequest
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
 
-from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.catalogs.models import Catalog, Product, ProductVariant
+from teamspirit.catalogs.views import catalog_view
 from teamspirit.core.models import Address
-from teamspirit.preorders.models import ShoppingCart, ShoppingCartLine
+from teamspirit.preorders.cache import (
+    get_cart_item_count,
+    invalidate_cart_item_count,
+    invalidate_current_campaign,
+)
+from teamspirit.preorders.carts import get_shopping_cart
+from teamspirit.preorders.models import (
+    Campaign,
+    ShoppingCart,
+    ShoppingCartLine,
+)
 from teamspirit.preorders.views import (
     add_to_cart_view,
     drop_from_cart_view,
@@ -61,6 +75,13 @@ class PreordersViewsTestCase(TestCase):
             price=25,
             catalog=self.catalog,
         )
+        # the sizes of the product
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=self.product, size=size)
+            for size in ['XS', 'S', 'M', 'L', 'XL']
+        ])
+        Campaign.objects.create()
+        invalidate_current_campaign()  # no commit in this test case
         self.shopping_cart = ShoppingCart.objects.create(
             user=self.user,
         )
@@ -88,6 +109,51 @@ class PreordersViewsTestCase(TestCase):
             html
         )
 
+    def test_shopping_cart_view_closed(self):
+        """Unit test - app ``preorders`` - view ``shopping_cart_view``
+
+        Test the cart view when no campaign is current.
+        """
+        Campaign.objects.archive(Campaign.objects.all())
+        response = shopping_cart_view(self.get_request)
+        response.render()
+        html = response.content.decode('utf8')
+        self.assertIn("Les pré-commandes sont closes.", html)
+        self.assertIn("Votre panier de pré-commande est vide !", html)
+        request = HttpRequest()
+        request.method = 'get'
+        request.user = self.user
+        response = add_to_cart_view(request, product_id=self.product.id)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ShoppingCart.objects.count(), 1)
+
+    def test_shopping_cart_view_num_queries(self):
+        """Unit test - app ``preorders`` - view ``shopping_cart_view``
+
+        Test that the number of queries does not depend on the cart size.
+        """
+        for size in ['XS', 'S', 'L', 'XL']:
+            ShoppingCartLine.objects.create(
+                shopping_cart=self.shopping_cart,
+                product=Product.objects.create(
+                    name=f"T-shirt {size}",
+                    price=10,
+                    catalog=self.catalog,
+                ),
+                quantity=2,
+                size=size,
+            )
+        view = shopping_cart_view
+        get_cart_item_count(self.user.pk)  # warm the navbar badge cache
+        # the cart, its lines with their product, the resized images
+        with self.assertNumQueries(3):
+            response = view(self.get_request)
+            response.render()
+        self.assertIn(
+            'Montant total du panier : 105 €',
+            response.content.decode('utf8')
+        )
+
     def test_add_to_cart_view(self):
         """Unit test - app ``preorders`` - view ``add_to_cart_view``
 
@@ -105,6 +171,86 @@ class PreordersViewsTestCase(TestCase):
         self.assertTrue(html.startswith('<!DOCTYPE html>'))
         self.assertIn('<title>Team Spirit - Ajout de produit</title>', html)
 
+    def test_add_to_cart_view_no_size(self):
+        """Unit test - app ``preorders`` - view ``add_to_cart_view``
+
+        Test that a product without available size cannot be added.
+        """
+        self.product.variants.update(available=False)
+        response = add_to_cart_view(
+            self.get_request,
+            product_id=self.product.id
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            response.url,
+            reverse('catalogs:catalog', args=[self.catalog.id])
+        )
+
+    def test_add_to_cart_view_num_queries(self):
+        """Unit test - app ``preorders`` - view ``add_to_cart_view``
+
+        Test that the product, its sizes and the cart are fetched once each.
+        """
+        view = add_to_cart_view
+        get_cart_item_count(self.user.pk)  # warm the navbar badge cache
+        self.product.variants.filter(size='XL').update(available=False)
+        with self.assertNumQueries(3):
+            response = view(self.get_request, product_id=self.product.id)
+            response.render()
+        html = response.content.decode('utf8')
+        self.assertIn('<option value="XS">XS</option>', html)
+        self.assertNotIn('<option value="XL">XL</option>', html)
+
+    def test_drop_from_cart_view_num_queries(self):
+        """Unit test - app ``preorders`` - view ``drop_from_cart_view``
+
+        Test that the line is fetched once, with its cart and product.
+        """
+        view = drop_from_cart_view
+        get_cart_item_count(self.user.pk)  # warm the navbar badge cache
+        with self.assertNumQueries(1):
+            response = view(
+                self.get_request,
+                line_id=self.shopping_cart_line.id
+            )
+            response.render()
+
+    def test_drop_from_cart_view_other_user(self):
+        """Unit test - app ``preorders`` - view ``drop_from_cart_view``
+
+        Test that the lines of other users are not found.
+        """
+        other_user = User.objects.create_user(
+            email="titi@mail.com",
+            password="TopSecret",
+            personal=self.personal
+        )
+        other_line = ShoppingCartLine.objects.create(
+            shopping_cart=ShoppingCart.objects.create(user=other_user),
+            product=self.product,
+            quantity=1,
+            size='M',
+        )
+        view = drop_from_cart_view
+        with self.assertRaises(Http404):
+            view(self.get_request, line_id=other_line.id)
+
+    def test_get_shopping_cart(self):
+        """Unit test - app ``preorders`` - ``get_shopping_cart``
+
+        Test that the cart is fetched once per request.
+        """
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_shopping_cart(self.get_request),
+                self.shopping_cart
+            )
+            self.assertIs(
+                get_shopping_cart(self.get_request),
+                get_shopping_cart(self.get_request)
+            )
+
     def test_drop_from_cart_view(self):
         """Unit test - app ``preorders`` - view ``drop_from_cart_view``
 
@@ -124,3 +270,94 @@ class PreordersViewsTestCase(TestCase):
             '<title>Team Spirit - Suppression de produit</title>',
             html
         )
+
+
+class ShoppingCartBadgeTestCase(TransactionTestCase):
+    """Test the navbar badge, invalidated once the changes are committed."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="toto@mail.com",
+            first_name="Toto",
+            password="TopSecret",
+            personal=Personal.objects.create(
+                phone_number="01 02 03 04 05",
+                address=Address.objects.create(
+                    label_first="1 rue de l'impasse",
+                    label_second="",
+                    postal_code="75000",
+                    city="Paris",
+                    country="France"
+                )
+            )
+        )
+        self.get_request = HttpRequest()
+        self.get_request.method = 'get'
+        self.get_request.user = self.user
+        self.product = Product.objects.create(
+            name="Débardeur homme",
+            price=25,
+            catalog=Catalog.objects.create(name="Catalogue de vêtements"),
+        )
+        self.campaign = Campaign.objects.create()
+        invalidate_current_campaign()
+        invalidate_cart_item_count(self.user.pk, self.campaign.pk)
+        self.shopping_cart = ShoppingCart.objects.create(user=self.user)
+        self.shopping_cart_line = ShoppingCartLine.objects.create(
+            shopping_cart=self.shopping_cart,
+            product=self.product,
+            quantity=1,
+            size='M',
+        )
+
+    def test_shopping_cart_badge(self):
+        """Unit test - app ``preorders`` - navbar badge
+
+        Test the cached number of lines in the navbar.
+        """
+        # the current campaign, the next opening, the lines
+        with self.assertNumQueries(3):
+            self.assertEqual(get_cart_item_count(self.user.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cart_item_count(self.user.pk), 1)
+        # a new line invalidates the cached value, once committed
+        with transaction.atomic():
+            ShoppingCartLine.objects.create(
+                shopping_cart=self.shopping_cart,
+                product=self.product,
+                quantity=1,
+                size='L',
+            )
+            with self.assertNumQueries(0):
+                self.assertEqual(get_cart_item_count(self.user.pk), 1)
+        self.assertEqual(get_cart_item_count(self.user.pk), 2)
+        self.shopping_cart_line.delete()
+        self.assertEqual(get_cart_item_count(self.user.pk), 1)
+        response = catalog_view(
+            self.get_request,
+            catalog_id=self.product.catalog_id
+        )
+        response.render()
+        self.assertInHTML(
+            '<span class="badge badge-pill badge-light">1</span>',
+            response.content.decode('utf8')
+        )
+
+    def test_shopping_cart_badge_new_campaign(self):
+        """Unit test - app ``preorders`` - navbar badge
+
+        Test that the badge counts the cart of the current campaign only.
+        """
+        self.assertEqual(get_cart_item_count(self.user.pk), 1)
+        Campaign.objects.archive(Campaign.objects.all())
+        self.assertEqual(get_cart_item_count(self.user.pk), 0)
+        Campaign.objects.create()
+        self.assertEqual(get_cart_item_count(self.user.pk), 0)
+        ShoppingCartLine.objects.create(
+            shopping_cart=ShoppingCart.objects.create(user=self.user),
+            product=self.product,
+            quantity=1,
+            size='S',
+        )
+        self.assertEqual(get_cart_item_count(self.user.pk), 1)
@@ -54,3 +54,70 @@ class ProfilesManagersTestCase(TestCase):
         renamed_filed = rename_medical_file(instance, file_name)
         expected_renaming = "lic/LE RIGOLO_Toto/None"
         self.assertEqual(renamed_filed, expected_renaming)
+
+    def test_rename_file_cached_user(self):
+        instance = self.user.personal
+        instance.user = self.user
+        with self.assertNumQueries(0):
+            renamed_filed = rename_id_file(instance, "carte.pdf")
+        self.assertEqual(renamed_filed, "id/LE RIGOLO_Toto/carte.pdf")
+
+    def test_rename_file_no_user(self):
+        instance = Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=self.address
+        )
+        self.assertEqual(
+            rename_id_file(instance, "carte.pdf"),
+            "id/sans_utilisateur/carte.pdf"
+        )
+        self.assertEqual(
+            rename_medical_file(instance, "certificat.pdf"),
+            "lic/sans_utilisateur/certificat.pdf"
+        )
+
+    def test_with_user(self):
+        """Unit test - app ``profiles`` - queryset ``PersonalQuerySet``
+
+        Test that the users of the personal information are fetched at once.
+        """
+        for index in range(3):
+            User.objects.create_user(
+                email=f"user{index}@mail.com",
+                first_name=f"User{index}",
+                password="TopSecret",
+                personal=Personal.objects.create(
+                    phone_number="01 02 03 04 05",
+                    address=self.address
+                )
+            )
+        # the personal information, then their users
+        with self.assertNumQueries(2):
+            names = [
+                str(personal)
+                for personal in Personal.objects.with_user().order_by('pk')
+            ]
+        self.assertEqual(len(names), 4)
+        self.assertEqual(
+            names[0],
+            "Informations personnelles pour Toto LE RIGOLO"
+        )
+
+    def test_with_user_no_user(self):
+        """Unit test - app ``profiles`` - queryset ``PersonalQuerySet``
+
+        Test the personal information which no user has.
+        """
+        Personal.objects.create(
+            phone_number="01 02 03 04 05",
+            address=self.address
+        )
+        names = [
+            str(personal)
+            for personal in Personal.objects.with_user().order_by('pk')
+        ]
+        self.assertEqual(
+            names[1],
+            "Informations personnelles sans utilisateur"
+        )
+        self.assertIsNone(Personal.objects.order_by('pk').last().user)
@@ -0,0 +1,83 @@
+"""
+This module contains the unit tests related to
+the pagination helpers in app ``utils``.
+"""
+
+from django.test import TestCase
+
+from teamspirit.catalogs.models import Catalog, Product
+from teamspirit.utils.pagination import decode_cursor, paginate_keyset
+
+KEYSET = ('catalog_id', 'id')
+
+
+class PaginationTestCase(TestCase):
+    """Test the pagination helpers in the app ``utils``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = []
+        for name in ["Catalogue A", "Catalogue B"]:
+            catalog = Catalog.objects.create(name=name)
+            cls.products += [
+                Product.objects.create(
+                    name=f"Article {index}",
+                    catalog=catalog,
+                )
+                for index in range(3)
+            ]
+
+    def test_decode_cursor(self):
+        """Unit test - app ``utils`` - ``decode_cursor``
+
+        Test the decoded cursors, and the malformed ones.
+        """
+        self.assertIsNone(decode_cursor('', KEYSET))
+        self.assertEqual(decode_cursor('3-42', KEYSET), (3, 42))
+        for cursor in ['3', '3-42-1', 'a-b']:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor, KEYSET)
+
+    def test_paginate_keyset_forwards(self):
+        """Unit test - app ``utils`` - ``paginate_keyset``
+
+        Test the pages read forwards, across catalogs.
+        """
+        queryset = Product.objects.all()
+        with self.assertNumQueries(0):
+            page = paginate_keyset(queryset, KEYSET, 4)
+        with self.assertNumQueries(1):
+            self.assertEqual(page.object_list, self.products[:4])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        page = paginate_keyset(
+            queryset,
+            KEYSET,
+            4,
+            after=decode_cursor(page.next_cursor, KEYSET),
+        )
+        self.assertEqual(page.object_list, self.products[4:])
+        self.assertTrue(page.has_previous())
+        self.assertFalse(page.has_next())
+
+    def test_paginate_keyset_backwards(self):
+        """Unit test - app ``utils`` - ``paginate_keyset``
+
+        Test the pages read backwards.
+        """
+        page = paginate_keyset(
+            Product.objects.all(),
+            KEYSET,
+            2,
+            before=decode_cursor(
+                f"{self.products[4].catalog_id}-{self.products[4].pk}",
+                KEYSET
+            ),
+        )
+        self.assertEqual(page.object_list, self.products[2:4])
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertEqual(
+            page.next_cursor,
+            f"{self.products[3].catalog_id}-{self.products[3].pk}"
+        )
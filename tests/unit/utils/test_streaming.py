@@ -0,0 +1,34 @@
+"""
+This module contains the unit tests related to
+the streaming helpers in app ``utils``.
+"""
+
+from django.test import TestCase
+
+from teamspirit.utils.streaming import csv_response, stream_csv
+
+
+class StreamingTestCase(TestCase):
+    """Test the streaming helpers in the app ``utils``."""
+
+    def test_stream_csv(self):
+        """Unit test - app ``utils`` - ``stream_csv``
+
+        Test that the CSV lines are generated one at a time.
+        """
+        lines = stream_csv(iter([(1, 'a'), (2, 'b')]), header=['n', 'x'])
+        self.assertEqual(next(lines), "n;x\r\n")
+        self.assertEqual(list(lines), ["1;a\r\n", "2;b\r\n"])
+
+    def test_csv_response(self):
+        """Unit test - app ``utils`` - ``csv_response``
+
+        Test the streamed CSV attachment.
+        """
+        response = csv_response([(1, 'a')], filename='export.csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="export.csv"'
+        )
+        self.assertEqual(b''.join(response.streaming_content), b"1;a\r\n")